@@ -1,27 +1,50 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, Response, stream_with_context, abort
 from flask_migrate import Migrate
 from flask_login import LoginManager, login_required, current_user
-from models import db, Event, Ticket, User, TicketType
+from models import db, Event, Ticket, User, TicketType, TicketHold, StripeEvent, Job
 from accounts.routes import auth
+from services.inventory import reserve_stock
+from services.holds import create_hold, release_hold, release_expired_holds, has_active_holds
+from services.fulfillment import HANDLED_EVENT_TYPES, record_stripe_event, process_next_event
+from services.jobs import enqueue, run_jobs, requeue_stale_jobs
+from services.ticket_jobs import enqueue_ticket_rendering
+from services.pdf_cache import pdf_version, get_cached_pdf
+from services.artifacts import artifact_path, has_artifact
+from services.ticket_export import EXPORT_FORMATS, export_query, stream_tickets_zip, enqueue_pdf_export, export_pdf_path
+from services.search import apply_search, install_search_index
+from services.query_report import route_queries, explain, has_full_scan, seed_dataset, is_test_database
+from services.pagination import keyset_page
+from services.identity_previews import get_preview, identity_document_path
+from services.principal import load_principal, invalidate_principal
+from services.user_admin import ROLES, REQUEST_STATUSES, filter_users, review_organizer_requests
+from services.images import InvalidImage, process_image, image_variants, VARIANT_PATTERN
+from services.uploads import (acquire_upload, release_upload, replace_upload, recount_references,
+                              collect_garbage, upload_url)
+from services.loading import with_profile
+from services.query_budget import query_budget, init_query_budget
+from services.instrumentation import init_instrumentation, route_summary
+from services.logging_config import configure_logging
+from services.static_assets import init_static_assets, compress_static
+from services.page_cache import init_page_cache, cached_page, mark_stale, event_tag, EVENT_LIST_TAG
+from services.dashboard import organizer_dashboard, organizer_daily_sales, organizer_sales_rows
+from services.sales import record_sale, refresh_available_total, reconcile_counters, rebuild_sales_daily
+from services.pricing import refresh_price_range, backfill_price_ranges
+from services.facets import (facet_snapshot, record_event_created, record_event_updated,
+                             record_event_deleted, rebuild_facets, get_facets, invalidate_facets)
 from datetime import datetime, timedelta
 import os
+import io
+import json
+import csv
+import time
 import stripe
 from werkzeug.utils import secure_filename
-from sqlalchemy import func, or_
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import Image
-from io import BytesIO
-import qrcode
-from PIL import Image as PILImage
-from reportlab.lib.utils import ImageReader
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from sqlalchemy.orm import load_only
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 from functools import wraps
 from flask.cli import with_appcontext
 import click
-import logging
 import re
 
 app = Flask(__name__)
@@ -40,20 +63,59 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # recommandé pour éviter
 app.config['DEBUG'] = os.getenv('FLASK_DEBUG', '0') == '1'
 app.config['SQLALCHEMY_ECHO'] = os.getenv('SQLALCHEMY_ECHO', '0') == '1'
 
-# Configuration du logging
-logging.basicConfig(level=logging.DEBUG)
-app.logger.setLevel(logging.DEBUG)
-
-# Configuration de SQLAlchemy logging
-logging.getLogger('sqlalchemy.engine').setLevel(logging.DEBUG)
+# Configuration du logging (file en arrière-plan, JSON en production)
+configure_logging(app)
 
 # Configuration de Stripe via variables d'environnement
 stripe.api_key = os.getenv('STRIPE_SECRET_KEY', '')
 app.config['STRIPE_PUBLIC_KEY'] = os.getenv('STRIPE_PUBLIC_KEY', '')
+app.config['STRIPE_WEBHOOK_SECRET'] = os.getenv('STRIPE_WEBHOOK_SECRET', '')
+
+# Durée de réservation des places pendant le paiement (Stripe impose au moins 30 minutes)
+app.config['TICKET_HOLD_TTL'] = timedelta(minutes=int(os.getenv('TICKET_HOLD_TTL_MINUTES', '30')))
+STRIPE_MIN_SESSION_TTL = timedelta(minutes=30)
+STRIPE_SESSION_TTL_MARGIN = timedelta(minutes=2)
+
+# Instrumentation SQL : en-tête Server-Timing, statistiques par route, journal des requêtes lentes
+app.config['SERVER_TIMING'] = os.getenv('SERVER_TIMING', '1') == '1'
+app.config['ROUTE_STATS_WINDOW'] = int(os.getenv('ROUTE_STATS_WINDOW', '1000'))
+app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+app.config['SLOW_QUERY_SAMPLE_RATE'] = float(os.getenv('SLOW_QUERY_SAMPLE_RATE', '1.0'))
+
+# Cache des pages publiques pour les visiteurs anonymes : 'memory', 'redis' ou 'none'
+app.config['PAGE_CACHE_BACKEND'] = os.getenv('PAGE_CACHE_BACKEND', 'memory')
+app.config['PAGE_CACHE_REDIS_URL'] = os.getenv('PAGE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+app.config['PAGE_CACHE_TTL'] = int(os.getenv('PAGE_CACHE_TTL', '300'))
+app.config['PAGE_CACHE_MAX_ENTRIES'] = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', '1000'))
+
+# Contrôle du nombre de requêtes SQL par route : 'off', 'warn' ou 'raise' (tests)
+app.config['QUERY_BUDGET_MODE'] = os.getenv('QUERY_BUDGET_MODE', 'off')
+
+# Durée de vie (secondes) du cache de l'utilisateur connecté (identité et rôle)
+app.config['USER_PRINCIPAL_TTL'] = int(os.getenv('USER_PRINCIPAL_TTL', '60'))
+
+# Durée de vie (secondes) du cache des filtres de la page d'accueil
+app.config['FACET_CACHE_TTL'] = int(os.getenv('FACET_CACHE_TTL', '300'))
+
+# Fichiers statiques : durée de cache des URL empreintées, envoi délégué au serveur frontal
+# ('x-accel-redirect' pour nginx, 'x-sendfile' pour Apache/lighttpd)
+app.config['STATIC_MAX_AGE'] = int(os.getenv('STATIC_MAX_AGE', str(365 * 24 * 3600)))
+app.config['STATIC_OFFLOAD'] = os.getenv('STATIC_OFFLOAD', '')
+app.config['STATIC_ACCEL_PREFIX'] = os.getenv('STATIC_ACCEL_PREFIX', '/_static/')
+
+# Période couverte par la courbe des ventes du tableau de bord
+DASHBOARD_SALES_DAYS = 30
+
+# Pagination de la liste des événements
+EVENTS_PER_PAGE = 12
+MAX_EVENTS_PER_PAGE = 48
+
+# Pagination des listes d'administration
+ADMIN_PER_PAGE = 25
 
 # Configuration pour l'upload d'images
 UPLOAD_FOLDER = 'static/uploads/events'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB max
 
@@ -65,18 +127,56 @@ MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB max
 app.config['UPLOAD_FOLDER_IDENTITY'] = UPLOAD_FOLDER_IDENTITY
 app.config['MAX_CONTENT_LENGTH_IDENTITY'] = MAX_CONTENT_LENGTH
 
+# Aperçus des pièces d'identité, générés à la demande (hors du dossier static)
+app.config['IDENTITY_PREVIEW_FOLDER'] = os.getenv('IDENTITY_PREVIEW_FOLDER', os.path.join(app.instance_path, 'identity_previews'))
+
+# Stockage des PDF de tickets rendus par le worker
+app.config['TICKET_PDF_FOLDER'] = os.getenv('TICKET_PDF_FOLDER', os.path.join(app.instance_path, 'tickets'))
+app.config['TICKET_PDF_CACHE_MAX_BYTES'] = int(os.getenv('TICKET_PDF_CACHE_MAX_MB', '500')) * 1024 * 1024
+
+# Exports PDF multi-pages assemblés par le worker
+app.config['TICKET_EXPORT_FOLDER'] = os.getenv('TICKET_EXPORT_FOLDER', os.path.join(app.instance_path, 'exports'))
+
+# Stockage adressé par contenu des QR codes
+app.config['ARTIFACT_FOLDER'] = os.getenv('ARTIFACT_FOLDER', os.path.join(app.instance_path, 'artifacts'))
+
 # Créer le dossier d'upload s'il n'existe pas
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+def next_page_url(endpoint, next_cursor):
+    """URL de la page suivante : paramètres de la requête courante, avec le nouveau curseur."""
+    if not next_cursor:
+        return None
+    args = request.args.to_dict()
+    args.pop('partial', None)
+    args['cursor'] = next_cursor
+    return url_for(endpoint, **args)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def save_event_image(file):
+    """Traite une image d'événement téléversée ; retourne son URL, ou None si elle est invalide."""
+    try:
+        filename = process_image(file.read(), app.config['UPLOAD_FOLDER'])
+    except InvalidImage:
+        flash('L\'image téléversée est invalide et a été ignorée.', 'warning')
+        return None
+    return upload_url(filename)
+
 def allowed_file_identity(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS_IDENTITY
 
+# Variantes responsives des images d'événements dans les templates
+app.add_template_global(image_variants)
+
 # Initialisation de la base de données
 db.init_app(app)
 migrate = Migrate(app, db)
+init_instrumentation(app)
+init_query_budget(app)
+init_page_cache(app)
+init_static_assets(app)
 
 # Initialisation de Flask-Login
 login_manager = LoginManager()
@@ -87,7 +187,8 @@ login_manager.login_message_category = 'info'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Identité et rôle en cache : les vérifications de rôle ne touchent pas la base
+    return load_principal(user_id)
 
 # Enregistrement du blueprint d'authentification
 app.register_blueprint(auth, url_prefix='/auth')
@@ -113,6 +214,8 @@ def organizer_required(f):
     return decorated_function
 
 @app.route('/')
+@query_budget(6)
+@cached_page(lambda: [EVENT_LIST_TAG])
 def index():
     # Récupérer les paramètres de filtrage
     search = request.args.get('search', '')
@@ -120,18 +223,16 @@ def index():
     location = request.args.get('location', '')
     price_sort = request.args.get('price_sort', '')
     status = request.args.get('status', '')  # Nouveau paramètre pour le statut
+    cursor = request.args.get('cursor')
+    per_page = max(1, min(request.args.get('per_page', EVENTS_PER_PAGE, type=int) or EVENTS_PER_PAGE, MAX_EVENTS_PER_PAGE))
 
     # Construire la requête de base
-    query = Event.query
+    query = with_profile(Event.query, 'event_cards')
 
-    # Appliquer les filtres
+    # Appliquer les filtres (recherche plein texte indexée)
+    search_rank = None
     if search:
-        query = query.filter(
-            or_(
-                Event.title.ilike(f'%{search}%'),
-                Event.description.ilike(f'%{search}%')
-            )
-        )
+        query, search_rank = apply_search(query, search)
     
     if event_type:
         query = query.filter(Event.event_type == event_type)
@@ -148,29 +249,36 @@ def index():
     elif status == 'past':
         query = query.filter(Event.date + timedelta(hours=24) < now)
 
-    # Récupérer les types d'événements et lieux uniques pour les filtres
-    event_types = db.session.query(Event.event_type).distinct().all()
-    event_types = [t[0] for t in event_types]
-    
-    locations = db.session.query(Event.location).distinct().all()
-    locations = [l[0] for l in locations]
+    # Types d'événements et lieux pour les filtres, avec leur nombre d'événements (en cache)
+    facets = get_facets(upcoming_only=status == 'upcoming')
 
-    # Appliquer le tri par prix si demandé
+    # Choisir le tri ; l'identifiant termine toujours la clé pour un ordre stable
     if price_sort == 'asc':
-        query = query.order_by(Event.ticket_types.any(TicketType.price.asc()))
+        # Prix dénormalisés sur l'événement : tri servi par index
+        sort_name, columns, descending = 'price_asc', [Event.min_price, Event.id], False
     elif price_sort == 'desc':
-        query = query.order_by(Event.ticket_types.any(TicketType.price.desc()))
+        sort_name, columns, descending = 'price_desc', [Event.max_price, Event.id], True
+    elif search_rank is not None:
+        # Résultats de recherche classés par pertinence
+        sort_name, columns, descending = 'rank', [search_rank, Event.id], True
     else:
         # Par défaut, trier par date (les plus récents en premier)
-        query = query.order_by(Event.date.desc())
+        sort_name, columns, descending = 'date', [Event.date, Event.id], True
+
+    # Pagination par clé : coût constant quelle que soit la page
+    events, next_cursor = keyset_page(query, sort_name, columns, descending, cursor=cursor, per_page=per_page)
+
+    next_url = next_page_url('index', next_cursor)
 
-    # Exécuter la requête
-    events = query.all()
+    # Chargement progressif : ne renvoyer que les cartes suivantes
+    if request.args.get('partial'):
+        return render_template('_event_cards.html', events=events), 200, {'X-Next-Url': next_url or ''}
 
     return render_template('index.html', 
                          events=events,
-                         event_types=event_types,
-                         locations=locations)
+                         event_types=facets['event_type'],
+                         locations=facets['location'],
+                         next_url=next_url)
 
 @app.route('/my-events')
 @login_required
@@ -180,8 +288,9 @@ def my_events():
 
 @app.route('/my-events-list')
 @organizer_required
+@query_budget(2)
 def my_events_list():
-    events = Event.query.filter_by(organizer_id=current_user.id).order_by(Event.date.desc()).all()
+    events = with_profile(Event.query, 'event_cards').filter_by(organizer_id=current_user.id).order_by(Event.date.desc()).all()
     now = datetime.now()
     return render_template('my_events_list.html', events=events, now=now, timedelta=timedelta)
 
@@ -201,12 +310,7 @@ def new_event():
         if 'image' in request.files:
             file = request.files['image']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"{timestamp}_{filename}"
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
-                image_url = f"/static/uploads/events/{filename}"
+                image_url = save_event_image(file)
 
         # Création de l'événement
         event = Event(
@@ -219,6 +323,7 @@ def new_event():
             organizer_id=current_user.id
         )
         db.session.add(event)
+        acquire_upload(image_url)
         db.session.flush()  # Pour obtenir l'ID de l'événement
 
         # Création des types de tickets
@@ -232,15 +337,22 @@ def new_event():
             )
             db.session.add(ticket_type)
 
+        refresh_price_range(event.id)
+        refresh_available_total(event.id)
+        record_event_created(event)
+        mark_stale(EVENT_LIST_TAG)
         db.session.commit()
+        invalidate_facets()
         flash('Événement créé avec succès !', 'success')
         return redirect(url_for('event_detail', event_id=event.id))
     return render_template('new_event.html')
 
 @app.route('/event/<int:event_id>')
+@query_budget(3)
+@cached_page(lambda event_id: [event_tag(event_id)])
 def event_detail(event_id):
-    event = Event.query.get_or_404(event_id)
-    ticket_types = TicketType.query.filter_by(event_id=event_id).all()
+    event = with_profile(Event.query, 'event_detail').filter_by(id=event_id).first_or_404()
+    ticket_types = event.ticket_types
     return render_template('event_detail.html', event=event, ticket_types=ticket_types)
 
 @app.route('/event/<int:event_id>/edit', methods=['GET', 'POST'])
@@ -252,6 +364,7 @@ def edit_event(event_id):
         return redirect(url_for('event_detail', event_id=event.id))
 
     if request.method == 'POST':
+        previous_facets = facet_snapshot(event)
         event.title = request.form['title']
         event.description = request.form['description']
         event.event_type = request.form['event_type']
@@ -262,20 +375,16 @@ def edit_event(event_id):
         if 'image' in request.files:
             file = request.files['image']
             if file and file.filename and allowed_file(file.filename):
-                if event.image_url:
-                    old_image_path = os.path.join(app.root_path, event.image_url.lstrip('/'))
-                    if os.path.exists(old_image_path):
-                        os.remove(old_image_path)
-                
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"{timestamp}_{filename}"
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
-                event.image_url = f"/static/uploads/events/{filename}"
+                image_url = save_event_image(file)
+                if image_url:
+                    # L'ancienne image est supprimée par `flask gc-uploads` si plus rien ne la référence
+                    replace_upload(event.image_url, image_url)
+                    event.image_url = image_url
 
         # Mise à jour des types de tickets
         ticket_types_count = int(request.form['ticket_types_count'])
+        # Remettre en stock les réservations expirées : seules les actives comptent
+        release_expired_holds(event_id=event.id, batch_size=None)
         existing_types = TicketType.query.filter_by(event_id=event.id).all()
         
         # Supprimer les types de tickets qui ne sont plus utilisés
@@ -296,7 +405,12 @@ def edit_event(event_id):
             )
             db.session.add(ticket_type)
 
+        refresh_price_range(event.id)
+        refresh_available_total(event.id)
+        record_event_updated(previous_facets, event)
+        mark_stale(EVENT_LIST_TAG, event_tag(event.id))
         db.session.commit()
+        invalidate_facets()
         flash('Événement mis à jour avec succès !', 'success')
         return redirect(url_for('event_detail', event_id=event.id))
 
@@ -316,8 +430,18 @@ def delete_event(event_id):
         flash('Impossible de supprimer l\'événement car des tickets ont déjà été vendus.', 'error')
         return redirect(url_for('event_detail', event_id=event.id))
 
+    # Refuser si un paiement est en cours ; les réservations expirées sont libérées
+    if has_active_holds(event.id):
+        flash('Impossible de supprimer l\'événement car des paiements sont en cours. Réessayez dans quelques minutes.', 'error')
+        return redirect(url_for('event_detail', event_id=event.id))
+    release_expired_holds(event_id=event.id, batch_size=None)
+
+    record_event_deleted(facet_snapshot(event))
+    release_upload(event.image_url)
+    mark_stale(EVENT_LIST_TAG, event_tag(event.id))
     db.session.delete(event)
     db.session.commit()
+    invalidate_facets()
     flash('Événement supprimé avec succès!', 'success')
     return redirect(url_for('my_events'))
 
@@ -334,7 +458,9 @@ def buy_tickets(event_id):
         flash('La quantité doit être supérieure à 0 !', 'error')
         return redirect(url_for('event_detail', event_id=event.id))
     
-    if quantity > ticket_type.available_quantity:
+    # Décrémenter le stock de façon atomique (pas de survente possible)
+    if ticket_type.event_id != event.id or not reserve_stock(ticket_type.id, quantity):
+        db.session.rollback()
         flash(f'Désolé, il ne reste que {ticket_type.available_quantity} places disponibles pour ce type de ticket !', 'error')
         return redirect(url_for('event_detail', event_id=event.id))
     
@@ -348,14 +474,12 @@ def buy_tickets(event_id):
         payment_status='en_attente'
     )
     
-    # Mettre à jour le nombre de tickets disponibles
-    ticket_type.available_quantity -= quantity
-    
     db.session.add(ticket)
-    db.session.commit()
-    
-    # Générer le QR code
-    ticket.generate_qr_code()
+    db.session.flush()  # Pour obtenir l'ID du ticket
+    record_sale(ticket)
+
+    # Le QR code et le PDF sont générés par le worker
+    enqueue_ticket_rendering(ticket)
     db.session.commit()
     
     flash(f'Achat de {quantity} tickets effectué avec succès ! Prix total : {ticket.total_price:.2f} FCFA', 'success')
@@ -363,45 +487,68 @@ def buy_tickets(event_id):
 
 @app.route('/purchase-history')
 @login_required
+@query_budget(2)
 def purchase_history():
-    tickets = Ticket.query.filter_by(user_id=current_user.id).order_by(Ticket.purchase_date.desc()).all()
+    tickets = with_profile(Ticket.query, 'purchase_history').filter_by(user_id=current_user.id).order_by(Ticket.purchase_date.desc()).all()
     return render_template('purchase_history.html', tickets=tickets)
 
 @app.route('/dashboard')
 @organizer_required
 def dashboard():
-    # Statistiques générales
-    total_events = Event.query.filter_by(organizer_id=current_user.id).count()
-    total_tickets_sold = db.session.query(func.sum(Ticket.quantity)).filter(
-        Ticket.event_id.in_([e.id for e in Event.query.filter_by(organizer_id=current_user.id).all()])
-    ).scalar() or 0
-    total_revenue = db.session.query(func.sum(Ticket.total_price)).filter(
-        Ticket.event_id.in_([e.id for e in Event.query.filter_by(organizer_id=current_user.id).all()])
-    ).scalar() or 0
-
-    # Données pour les graphiques
-    events = Event.query.filter_by(organizer_id=current_user.id).all()
-    event_names = [event.title for event in events]
-    event_sales = []
-    total_available_tickets = 0
-
-    for event in events:
-        tickets_sold = event.get_total_tickets_sold()
-        event_sales.append(tickets_sold)
-        total_available_tickets += event.get_available_tickets()
-
-    # Récupérer les événements récents pour le tableau
-    recent_events = Event.query.filter_by(organizer_id=current_user.id).order_by(Event.date.desc()).all()
+    # Toutes les statistiques en une seule requête groupée
+    stats = organizer_dashboard(current_user.id)
+    events, totals = stats['events'], stats['totals']
+
+    # Courbe des ventes journalières (agrégat pré-calculé)
+    daily = organizer_daily_sales(current_user.id, days=DASHBOARD_SALES_DAYS)
 
     return render_template('dashboard.html',
-                         total_events=total_events,
-                         total_tickets_sold=total_tickets_sold,
-                         total_revenue=total_revenue,
-                         event_names=event_names,
-                         event_sales=event_sales,
-                         total_available_tickets=total_available_tickets,
+                         total_events=totals['events'],
+                         total_tickets_sold=totals['tickets_sold'],
+                         total_revenue=totals['revenue'],
+                         event_names=[event['title'] for event in events],
+                         event_sales=[event['tickets_sold'] for event in events],
+                         total_available_tickets=totals['available'],
                          has_events=bool(events),
-                         recent_events=recent_events)
+                         recent_events=events,
+                         sales_days=[day['day'] for day in daily],
+                         daily_tickets=[day['tickets_sold'] for day in daily],
+                         daily_revenue=[day['revenue'] for day in daily])
+
+@app.route('/dashboard/data')
+@organizer_required
+def dashboard_data():
+    """Statistiques du tableau de bord au format JSON."""
+    days = min(max(request.args.get('days', DASHBOARD_SALES_DAYS, type=int) or DASHBOARD_SALES_DAYS, 1), 366)
+    stats = organizer_dashboard(current_user.id)
+    stats['daily'] = organizer_daily_sales(current_user.id, days=days)
+    return jsonify(stats)
+
+@app.route('/dashboard/sales.csv')
+@organizer_required
+def export_sales_csv():
+    """Export CSV des ventes journalières de l'organisateur."""
+    days = request.args.get('days', type=int)
+    since = datetime.now().date() - timedelta(days=days - 1) if days and days > 0 else None
+    rows = organizer_sales_rows(current_user.id, since=since)
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['jour', 'evenement', 'type_ticket', 'tickets_vendus', 'revenu'])
+        for row in rows:
+            writer.writerow([row.day.isoformat(), row.title, row.name, row.tickets_sold, row.revenue])
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename="ventes_journalieres.csv"'}
+    )
 
 @app.route('/event/<int:event_id>/create-payment', methods=['POST'])
 @login_required
@@ -428,10 +575,18 @@ def create_payment(event_id):
         flash('Type de ticket invalide.', 'error')
         return redirect(url_for('event_detail', event_id=event.id))
 
-    # Vérifier la disponibilité des tickets
-    if ticket_type.available_quantity < quantity:
+    if quantity <= 0:
+        flash('La quantité doit être supérieure à 0 !', 'error')
+        return redirect(url_for('event_detail', event_id=event.id))
+
+    # Réserver les places le temps du paiement
+    hold = create_hold(event.id, ticket_type.id, current_user.id, quantity,
+                       ttl=app.config['TICKET_HOLD_TTL'])
+    if hold is None:
+        db.session.rollback()
         flash('Désolé, il ne reste plus assez de tickets disponibles.', 'error')
         return redirect(url_for('event_detail', event_id=event.id))
+    db.session.commit()
 
     try:
         # Construire les URLs de redirection
@@ -439,6 +594,11 @@ def create_payment(event_id):
         success_url = f"{base_url}/payment/success?session_id={{CHECKOUT_SESSION_ID}}"
         cancel_url = f"{base_url}/payment/cancel?session_id={{CHECKOUT_SESSION_ID}}"
 
+        # Stripe impose au moins 30 minutes (marge pour le délai avant que Stripe ne
+        # reçoive l'appel) ; la réservation est ensuite alignée sur la session
+        session_ttl = max(app.config['TICKET_HOLD_TTL'], STRIPE_MIN_SESSION_TTL) + STRIPE_SESSION_TTL_MARGIN
+        session_options = {'expires_at': int(time.time() + session_ttl.total_seconds())}
+
         # Créer la session de paiement Stripe
         stripe_session = stripe.checkout.Session.create(
             payment_method_types=['card'],
@@ -460,12 +620,22 @@ def create_payment(event_id):
                 'event_id': str(event.id),
                 'ticket_type_id': str(ticket_type_id),
                 'quantity': str(quantity),
-                'user_id': str(current_user.id)
-            }
+                'user_id': str(current_user.id),
+                'hold_id': str(hold.id)
+            },
+            **session_options
         )
+
+        hold.stripe_session_id = stripe_session.id
+        # La réservation dure au moins autant que la session : pas de paiement sans places réservées
+        hold.expires_at = max(hold.expires_at, datetime.utcfromtimestamp(stripe_session.expires_at))
+        db.session.commit()
         
         return redirect(stripe_session.url)
     except Exception as e:
+        db.session.rollback()
+        release_hold(hold)
+        db.session.commit()
         flash(f'Erreur lors de la création du paiement : {str(e)}', 'error')
         return redirect(url_for('event_detail', event_id=event.id))
 
@@ -477,53 +647,38 @@ def payment_success():
         flash('Session de paiement invalide.', 'error')
         return redirect(url_for('index'))
 
-    try:
-        # Récupérer la session Stripe
-        session = stripe.checkout.Session.retrieve(session_id)
-        
-        # Vérifier que la session appartient à l'utilisateur actuel
-        if session.metadata.get('user_id') != str(current_user.id):
+    # Les tickets sont émis par le worker à partir du webhook Stripe :
+    # ici on se contente de consulter l'état de la commande
+    ticket = Ticket.query.filter_by(stripe_session_id=session_id).first()
+    if ticket:
+        if ticket.user_id != current_user.id:
             flash('Accès non autorisé.', 'error')
             return redirect(url_for('index'))
+        flash('Paiement effectué avec succès ! Vos tickets ont été ajoutés à votre compte.', 'success')
+        return redirect(url_for('purchase_history'))
 
-        # Vérifier que le paiement a réussi
-        if session.payment_status != 'paid':
-            flash('Le paiement n\'a pas été complété.', 'error')
-            return redirect(url_for('event_detail', event_id=session.metadata.get('event_id')))
-
-        # Récupérer les informations de la session
-        event_id = int(session.metadata.get('event_id'))
-        ticket_type_id = int(session.metadata.get('ticket_type_id'))
-        quantity = int(session.metadata.get('quantity'))
-
-        # Créer le ticket
-        ticket = Ticket(
-            user_id=current_user.id,
-            event_id=event_id,
-            ticket_type_id=ticket_type_id,
-            quantity=quantity,
-            total_price=session.amount_total / 100,  # Convertir les centimes en euros
-            payment_status='payé',
-            payment_reference=session.payment_intent,
-            purchase_date=datetime.now()
-        )
-        db.session.add(ticket)
-        db.session.flush()  # Pour obtenir l'ID du ticket
+    refunded = StripeEvent.query.filter_by(checkout_session_id=session_id, status='remboursé').first()
+    if refunded:
+        flash('Désolé, les places ont été vendues entre-temps. Votre paiement a été remboursé.', 'error')
+        return redirect(url_for('index'))
 
-        # Générer le QR code
-        ticket.generate_qr_code()
+    flash('Paiement reçu, vos tickets sont en cours de traitement et apparaîtront dans quelques instants.', 'info')
+    return redirect(url_for('purchase_history'))
 
-        # Mettre à jour la quantité disponible
-        ticket_type = TicketType.query.get(ticket_type_id)
-        ticket_type.available_quantity -= quantity
+@app.route('/stripe/webhook', methods=['POST'])
+def stripe_webhook():
+    payload = request.get_data()
+    sig_header = request.headers.get('Stripe-Signature', '')
 
-        db.session.commit()
-        flash('Paiement effectué avec succès ! Vos tickets ont été ajoutés à votre compte.', 'success')
-        return redirect(url_for('purchase_history'))
-    except Exception as e:
-        db.session.rollback()
-        flash(f'Erreur lors du traitement du paiement : {str(e)}', 'error')
-        return redirect(url_for('index'))
+    try:
+        event = stripe.Webhook.construct_event(payload, sig_header, app.config['STRIPE_WEBHOOK_SECRET'])
+    except (ValueError, stripe.error.SignatureVerificationError):
+        return jsonify({'error': 'Signature invalide'}), 400
+
+    if event['type'] in HANDLED_EVENT_TYPES:
+        record_stripe_event(event)
+
+    return jsonify({'received': True})
 
 @app.route('/payment/cancel')
 @login_required
@@ -544,6 +699,13 @@ def payment_cancel():
 
         # Expirer la session Stripe
         stripe.checkout.Session.expire(session_id)
+
+        # Libérer les places réservées
+        hold_id = stripe_session.metadata.get('hold_id')
+        hold = TicketHold.query.get(int(hold_id)) if hold_id else None
+        if hold:
+            release_hold(hold)
+            db.session.commit()
         
         # Récupérer l'ID de l'événement depuis les métadonnées
         event_id = stripe_session.metadata.get('event_id')
@@ -577,81 +739,120 @@ def download_ticket(ticket_id):
         flash('Accès non autorisé.', 'danger')
         return redirect(url_for('purchase_history'))
 
-    # Créer le PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    elements = []
-
-    # Titre
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30
-    )
-    elements.append(Paragraph(f"Ticket - {ticket.event.title}", title_style))
-
-    # Informations du ticket
-    info_style = ParagraphStyle(
-        'CustomInfo',
-        parent=styles['Normal'],
-        fontSize=12,
-        spaceAfter=12
+    # Servir le PDF en cache s'il correspond aux informations actuelles du ticket
+    version = pdf_version(ticket.get_pdf_info())
+    pdf_path = get_cached_pdf(ticket.id, version)
+    if pdf_path:
+        filename = f"ticket_{ticket.event.title.replace(' ', '_')}_{ticket.id}.pdf"
+        response = send_file(
+            pdf_path,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/pdf',
+            etag=f"{ticket.id}-{version}",
+            conditional=True
+        )
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    # Sinon, programmer le rendu et attendre qu'il soit prêt
+    job = enqueue('ticket_pdf', {'ticket_id': ticket.id}, key=f"ticket_pdf:{ticket.id}", user_id=ticket.user_id)
+    db.session.commit()
+    return render_template('ticket_pending.html', ticket=ticket, job=job), 202
+
+@app.route('/ticket/<int:ticket_id>/qr.png')
+@login_required
+def ticket_qr(ticket_id):
+    ticket = Ticket.query.get_or_404(ticket_id)
+    if ticket.user_id != current_user.id and not current_user.is_admin():
+        return jsonify({'error': 'Accès non autorisé'}), 403
+
+    # Rendu à la demande si le QR code n'est pas encore dans le stockage
+    if not has_artifact(ticket.qr_digest, '.png'):
+        if ticket.qr_code:
+            ticket.migrate_legacy_qr_code()
+        else:
+            ticket.generate_qr_code()
+        db.session.commit()
+
+    # L'empreinte du contenu sert d'ETag fort (réponse 304 si inchangé)
+    response = send_file(
+        artifact_path(ticket.qr_digest, '.png'),
+        mimetype='image/png',
+        etag=ticket.qr_digest,
+        conditional=True,
+        max_age=86400
     )
-    
-    # Créer le QR code
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(f"Ticket ID: {ticket.id}\nEvent: {ticket.event.title}\nUser: {ticket.user.username}")
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convertir le QR code en image PIL
-    qr_buffer = BytesIO()
-    qr_img.save(qr_buffer, format='PNG')
-    qr_buffer.seek(0)
-    
-    # Créer une image ReportLab à partir du QR code
-    qr_img = Image(qr_buffer)
-    qr_img.drawHeight = 200
-    qr_img.drawWidth = 200
-
-    # Ajouter les informations du ticket
-    ticket_info = [
-        f"<b>Événement:</b> {ticket.event.title}",
-        f"<b>Date:</b> {ticket.event.date.strftime('%d/%m/%Y %H:%M')}",
-        f"<b>Lieu:</b> {ticket.event.location}",
-        f"<b>Type de ticket:</b> {ticket.ticket_type.name}",
-        f"<b>Quantité:</b> {ticket.quantity}",
-        f"<b>Prix total:</b> {ticket.total_price} FCFA",
-        f"<b>Date d'achat:</b> {ticket.purchase_date.strftime('%d/%m/%Y %H:%M')}",
-        f"<b>Statut du paiement:</b> {ticket.payment_status}"
-    ]
-
-    # Ajouter les informations du ticket au PDF
-    for info in ticket_info:
-        elements.append(Paragraph(info, info_style))
-
-    # Ajouter un espace avant le QR code
-    elements.append(Spacer(1, 20))
-
-    # Ajouter le QR code
-    elements.append(qr_img)
-
-    # Construire le PDF
-    doc.build(elements)
-    buffer.seek(0)
-
-    # Générer le nom du fichier
-    filename = f"ticket_{ticket.event.title.replace(' ', '_')}_{ticket.id}.pdf"
-    
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name=filename,
-        mimetype='application/pdf'
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
+@app.route('/event/<int:event_id>/tickets/export')
+@organizer_required
+def export_event_tickets(event_id):
+    event = Event.query.get_or_404(event_id)
+    if event.organizer_id != current_user.id and not current_user.is_admin():
+        flash('Vous n\'êtes pas autorisé à exporter les tickets de cet événement.', 'error')
+        return redirect(url_for('event_detail', event_id=event.id))
+
+    export_format = request.args.get('format', 'zip')
+    if export_format not in EXPORT_FORMATS:
+        flash('Format d\'export invalide.', 'error')
+        return redirect(url_for('my_events_list'))
+
+    ticket_type_id = request.args.get('ticket_type_id', type=int)
+    payment_status = request.args.get('status')
+
+    # Le PDF multi-pages est assemblé par le worker, puis téléchargé une fois prêt
+    if export_format == 'pdf':
+        job = enqueue_pdf_export(event.id, current_user.id, ticket_type_id=ticket_type_id, payment_status=payment_status)
+        db.session.commit()
+        return render_template('export_pending.html', event=event, job=job), 202
+
+    tickets = export_query(event.id, ticket_type_id=ticket_type_id, payment_status=payment_status)
+    filename = f"tickets_{event.title.replace(' ', '_')}_{event.id}.zip"
+    return Response(
+        stream_with_context(stream_tickets_zip(tickets)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{secure_filename(filename)}"'}
     )
 
+@app.route('/event/<int:event_id>/tickets/export/<int:job_id>')
+@organizer_required
+def download_ticket_export(event_id, job_id):
+    event = Event.query.get_or_404(event_id)
+    job = Job.query.get_or_404(job_id)
+    payload = json.loads(job.payload)
+    if job.kind != 'ticket_export_pdf' or job.user_id != current_user.id or payload['event_id'] != event.id:
+        flash('Accès non autorisé.', 'error')
+        return redirect(url_for('my_events_list'))
+
+    path = export_pdf_path(payload['export_id'])
+    if job.status != 'terminé' or not os.path.exists(path):
+        flash('Cet export n\'est pas disponible, veuillez le relancer.', 'warning')
+        return redirect(url_for('my_events_list'))
+
+    filename = f"tickets_{event.title.replace(' ', '_')}_{event.id}.pdf"
+    response = send_file(path, as_attachment=True, download_name=secure_filename(filename), mimetype='application/pdf')
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    job = Job.query.get_or_404(job_id)
+    if job.user_id != current_user.id:
+        return jsonify({'error': 'Accès non autorisé'}), 403
+    return jsonify({
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'error': job.last_error if job.status == 'échec' else None
+    })
+
 def save_identity_file(file, user_id, side):
     if file and allowed_file_identity(file.filename):
         filename = secure_filename(file.filename)
@@ -721,15 +922,17 @@ def request_organizer():
                 return redirect(url_for('request_organizer'))
 
             # Mise à jour de l'utilisateur
-            current_user.organizer_request_phone = phone  # On garde le format original
-            current_user.organizer_request_identity_type = identity_type
-            current_user.organizer_request_identity_recto = recto_path
-            current_user.organizer_request_identity_verso = verso_path
-            current_user.organizer_request_message = request.form.get('message', '')
-            current_user.organizer_request_status = 'pending'
-            current_user.organizer_request_date = datetime.utcnow()
+            user = current_user.load()
+            user.organizer_request_phone = phone  # On garde le format original
+            user.organizer_request_identity_type = identity_type
+            user.organizer_request_identity_recto = recto_path
+            user.organizer_request_identity_verso = verso_path
+            user.organizer_request_message = request.form.get('message', '')
+            user.organizer_request_status = 'pending'
+            user.organizer_request_date = datetime.utcnow()
 
             db.session.commit()
+            invalidate_principal(user.id)
             flash('Votre demande a été envoyée avec succès. Elle sera examinée par nos administrateurs.', 'success')
             return redirect(url_for('index'))
 
@@ -742,15 +945,72 @@ def request_organizer():
 
 @app.route('/admin/organizer-requests')
 @admin_required
+@query_budget(2)
 def admin_organizer_requests():
-    pending_requests = User.query.filter_by(organizer_request_status='pending').all()
-    return render_template('admin/organizer_requests.html', requests=pending_requests)
+    status = request.args.get('status')
+    if status not in REQUEST_STATUSES:
+        status = 'pending'
+    query = filter_users(with_profile(User.query, 'organizer_requests'), request.args.get('q', ''), status=status)
+    # Clé de pagination non nulle : une comparaison avec NULL écarterait des lignes
+    query = query.filter(User.organizer_request_date.isnot(None))
+    # Les plus anciennes demandes d'abord, servi par l'index (statut, date)
+    requests, next_cursor = keyset_page(query, 'request_date', [User.organizer_request_date, User.id], False,
+                                        cursor=request.args.get('cursor'), per_page=ADMIN_PER_PAGE)
+    return render_template('admin/organizer_requests.html', requests=requests, status=status,
+                           statuses=REQUEST_STATUSES, next_url=next_page_url('admin_organizer_requests', next_cursor))
+
+def _identity_document_url(user_id, side):
+    if side not in ('recto', 'verso'):
+        abort(404)
+    user = User.query.options(load_only(User.organizer_request_identity_recto,
+                                        User.organizer_request_identity_verso)).get_or_404(user_id)
+    return getattr(user, f'organizer_request_identity_{side}')
+
+@app.route('/admin/organizer-request/<int:user_id>/identity/<side>')
+@admin_required
+def identity_document(user_id, side):
+    """Document d'identité d'origine."""
+    path = identity_document_path(_identity_document_url(user_id, side))
+    if path is None:
+        abort(404)
+    response = send_file(path, conditional=True)
+    response.cache_control.private = True
+    response.cache_control.no_store = True
+    return response
+
+@app.route('/admin/organizer-request/<int:user_id>/identity/<side>/preview')
+@admin_required
+def identity_document_preview(user_id, side):
+    """Miniature du document d'identité, générée à la première consultation."""
+    preview = get_preview(_identity_document_url(user_id, side))
+    if preview is None:
+        abort(404)
+    # Le nom de l'original change à chaque nouvel envoi : l'aperçu peut rester en cache navigateur
+    response = send_file(preview, mimetype='image/jpeg', conditional=True, max_age=3600)
+    response.cache_control.public = None
+    response.cache_control.private = True
+    return response
+
+@app.route('/admin/organizer-requests/review', methods=['POST'])
+@admin_required
+def review_organizer_requests_bulk():
+    action = request.form.get('action')
+    user_ids = request.form.getlist('user_ids', type=int)
+    if action not in ('approve', 'reject') or not user_ids:
+        flash('Sélectionnez au moins une demande et une action.', 'error')
+        return redirect(url_for('admin_organizer_requests'))
+
+    count = review_organizer_requests(user_ids, approve=action == 'approve')
+    verb = 'approuvée(s)' if action == 'approve' else 'rejetée(s)'
+    flash(f'{count} demande(s) {verb}.', 'success')
+    return redirect(url_for('admin_organizer_requests'))
 
 @app.route('/admin/organizer-request/<int:user_id>/approve')
 @admin_required
 def approve_organizer_request(user_id):
     user = User.query.get_or_404(user_id)
     success, msg = user.approve_organizer_request()
+    invalidate_principal(user.id)
     flash(msg, 'success' if success else 'error')
     return redirect(url_for('admin_organizer_requests'))
 
@@ -759,14 +1019,26 @@ def approve_organizer_request(user_id):
 def reject_organizer_request(user_id):
     user = User.query.get_or_404(user_id)
     success, msg = user.reject_organizer_request()
+    invalidate_principal(user.id)
     flash(msg, 'success' if success else 'error')
     return redirect(url_for('admin_organizer_requests'))
 
 @app.route('/admin/users')
 @admin_required
+@query_budget(2)
 def admin_users():
-    users = User.query.all()
-    return render_template('admin/users.html', users=users)
+    query = filter_users(with_profile(User.query, 'admin_users'), request.args.get('q', ''),
+                         request.args.get('role', ''), request.args.get('status', ''))
+    users, next_cursor = keyset_page(query, 'id', [User.id], False,
+                                     cursor=request.args.get('cursor'), per_page=ADMIN_PER_PAGE)
+    return render_template('admin/users.html', users=users, roles=ROLES, statuses=REQUEST_STATUSES,
+                           next_url=next_page_url('admin_users', next_cursor))
+
+@app.route('/admin/performance')
+@admin_required
+def admin_performance():
+    """Résumé glissant des temps de réponse et requêtes SQL par route (processus courant)."""
+    return jsonify(route_summary())
 
 @app.route('/admin/user/<int:user_id>/toggle-role')
 @admin_required
@@ -784,6 +1056,7 @@ def toggle_user_role(user_id):
         flash(f'L\'utilisateur {user.username} est maintenant administrateur.', 'success')
     
     db.session.commit()
+    invalidate_principal(user.id)
     return redirect(url_for('admin_users'))
 
 @app.route('/event/create', methods=['GET', 'POST'])
@@ -818,7 +1091,11 @@ def create_event():
         )
 
         db.session.add(event)
+        acquire_upload(image_url)
+        record_event_created(event)
+        mark_stale(EVENT_LIST_TAG)
         db.session.commit()
+        invalidate_facets()
 
         flash('Événement créé avec succès !', 'success')
         return redirect(url_for('event_detail', event_id=event.id))
@@ -855,6 +1132,221 @@ def create_admin():
     db.session.commit()
     click.echo(f"Administrateur {username} créé avec succès !")
 
+@app.cli.command("rebuild-search-index")
+@with_appcontext
+def rebuild_search_index():
+    """Installe et reconstruit l'index de recherche plein texte des événements."""
+    install_search_index()
+    click.echo("Index de recherche reconstruit.")
+
+@app.cli.command("rebuild-facets")
+@with_appcontext
+def rebuild_facets_command():
+    """Recalcule la table des facettes (types d'événements, lieux)."""
+    rebuild_facets()
+    click.echo("Facettes reconstruites.")
+
+@app.cli.command("backfill-event-prices")
+@with_appcontext
+def backfill_event_prices():
+    """Recalcule le prix minimum et maximum de chaque événement."""
+    count = backfill_price_ranges()
+    click.echo(f"Fourchette de prix recalculée pour {count} événement(s).")
+
+@app.cli.command("reconcile-sales-counters")
+@click.option('--fix', is_flag=True, help='Corrige les compteurs en écart.')
+@with_appcontext
+def reconcile_sales_counters(fix):
+    """Recalcule les compteurs de ventes et de stock et signale les écarts."""
+    drifts = reconcile_counters(fix=fix)
+    for table, row_id, counter, stored, expected in drifts:
+        click.echo(f"{table} {row_id} : {counter} = {stored}, attendu {expected}")
+    if not drifts:
+        click.echo("Aucun écart détecté.")
+    elif fix:
+        click.echo(f"{len(drifts)} écart(s) corrigé(s).")
+    else:
+        click.echo(f"{len(drifts)} écart(s) détecté(s) ; relancer avec --fix pour corriger.")
+
+@app.cli.command("rebuild-sales-daily")
+@with_appcontext
+def rebuild_sales_daily_command():
+    """Reconstruit l'agrégat des ventes journalières à partir des tickets."""
+    count = rebuild_sales_daily()
+    click.echo(f"{count} ligne(s) de ventes journalières.")
+
+@app.cli.command("process-event-images")
+@with_appcontext
+def process_event_images():
+    """Génère les variantes des images d'événements déjà téléversées.
+
+    Les événements sont repointés vers l'image traitée ; les fichiers
+    d'origine sont ensuite supprimés par `flask gc-uploads`.
+    """
+    folder = app.config['UPLOAD_FOLDER']
+    processed = 0
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if not os.path.isfile(path) or VARIANT_PATTERN.match(name) or name.endswith(('.webp', '.tmp')):
+            continue
+        if not allowed_file(name):
+            continue
+        with open(path, 'rb') as f:
+            try:
+                filename = process_image(f.read(), folder)
+            except InvalidImage:
+                click.echo(f"Image invalide ignorée : {name}")
+                continue
+
+        old_url, new_url = upload_url(name), upload_url(filename)
+        event_ids = [event.id for event in Event.query.filter_by(image_url=old_url).options(load_only(Event.id))]
+        if event_ids:
+            Event.query.filter(Event.id.in_(event_ids)).update({'image_url': new_url}, synchronize_session=False)
+            release_upload(old_url, len(event_ids))
+            acquire_upload(new_url, len(event_ids))
+            mark_stale(EVENT_LIST_TAG, *[event_tag(event_id) for event_id in event_ids])
+        db.session.commit()
+        processed += 1
+        click.echo(f"{name} -> {filename} ({len(event_ids)} événement(s))")
+    click.echo(f"{processed} image(s) traitée(s).")
+
+@app.cli.command("gc-uploads")
+@click.option('--batch-size', default=200, help='Nombre d\'images traitées par transaction.')
+@click.option('--grace-minutes', default=60, help='Âge minimal d\'un fichier avant suppression.')
+@click.option('--recount', is_flag=True, help='Recalcule d\'abord les références à partir des événements.')
+@click.option('--dry-run', is_flag=True, help='Affiche ce qui serait supprimé sans rien supprimer.')
+@with_appcontext
+def gc_uploads(batch_size, grace_minutes, recount, dry_run):
+    """Supprime les images d'événements qui ne sont plus référencées."""
+    if recount:
+        click.echo(f"{recount_references()} image(s) référencée(s) après recalcul.")
+    stats = collect_garbage(batch_size, timedelta(minutes=grace_minutes), dry_run)
+    verb = 'à supprimer' if dry_run else 'supprimé(s)'
+    click.echo(f"{stats['images']} image(s) non référencée(s), {stats['files']} fichier(s) {verb} "
+               f"({stats['bytes'] / 1024:.0f} Ko).")
+
+@app.cli.command("compress-static")
+@with_appcontext
+def compress_static_command():
+    """Précompresse les CSS/JS du dossier static (gzip, et brotli si installé) ; à lancer au build."""
+    written = compress_static(app.static_folder)
+    for path in written:
+        click.echo(os.path.relpath(path, app.static_folder))
+    click.echo(f"{len(written)} fichier(s) compressé(s).")
+
+@app.cli.command("explain-queries")
+@click.option('--seed', default=0, help='Insère d\'abord N événements synthétiques (base de test uniquement).')
+@click.option('--allow-non-test-db', is_flag=True,
+              help='Autorise --seed sur une base autre que SQLite ou de test (TESTING).')
+@click.option('--strict', is_flag=True, help='Code de sortie non nul si un parcours complet est détecté.')
+@with_appcontext
+def explain_queries(seed, allow_non_test_db, strict):
+    """Affiche le plan d'exécution des requêtes de chaque route."""
+    if seed:
+        if not (allow_non_test_db or is_test_database()):
+            raise click.UsageError(
+                f"--seed écrirait dans {db.engine.url.render_as_string()}, qui n'est pas une base de test "
+                "(SQLite ou TESTING) ; ajoutez --allow-non-test-db pour confirmer."
+            )
+        click.echo(f"Insertion de {seed} événements synthétiques...")
+        seed_dataset(events=seed, force=allow_non_test_db)
+        rebuild_facets()
+        backfill_price_ranges()
+        reconcile_counters(fix=True)
+        rebuild_sales_daily()
+
+    full_scans = []
+    for name, statement in route_queries():
+        plan = explain(statement)
+        scan = has_full_scan(plan)
+        if scan:
+            full_scans.append(name)
+        click.echo(f"== {name} [{'PARCOURS COMPLET' if scan else 'OK'}]")
+        for line in plan:
+            click.echo(f"   {line}")
+    db.session.rollback()
+
+    click.echo(f"{len(full_scans)} requête(s) avec parcours complet : {', '.join(full_scans) or 'aucune'}")
+    if strict and full_scans:
+        raise SystemExit(1)
+
+@app.cli.command("release-expired-holds")
+@click.option('--batch-size', default=500, show_default=True, help='Nombre de réservations traitées par lot.')
+@with_appcontext
+def release_expired_holds_command(batch_size):
+    """Libère les réservations de places expirées, par lots."""
+    total = 0
+    while True:
+        released = release_expired_holds(batch_size=batch_size)
+        db.session.commit()
+        total += released
+        if released < batch_size:
+            break
+    click.echo(f"{total} réservation(s) expirée(s) libérée(s).")
+
+@app.cli.command("process-stripe-events")
+@click.option('--watch', is_flag=True, help='Continue à traiter les nouveaux événements en boucle.')
+@click.option('--interval', default=2.0, show_default=True, help='Pause (secondes) lorsque la file est vide.')
+@with_appcontext
+def process_stripe_events(watch, interval):
+    """Honore les commandes reçues par webhook Stripe."""
+    processed = 0
+    while True:
+        while process_next_event():
+            processed += 1
+        if not watch:
+            break
+        time.sleep(interval)
+    click.echo(f"{processed} événement(s) Stripe traité(s).")
+
+@app.cli.command("worker")
+@click.option('--processes', default=os.cpu_count() or 1, show_default=True, help='Nombre de processus de rendu.')
+@click.option('--batch-size', default=20, show_default=True, help='Nombre de tâches réservées par lot.')
+@click.option('--interval', default=1.0, show_default=True, help='Pause (secondes) lorsque la file est vide.')
+@click.option('--once', is_flag=True, help='Vide la file puis s\'arrête.')
+@with_appcontext
+def worker(processes, batch_size, interval, once):
+    """Exécute les tâches de fond (QR codes, PDF des tickets)."""
+    # 'spawn' : les processus de rendu n'héritent pas des connexions à la base
+    context = multiprocessing.get_context('spawn')
+    processed = 0
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        while True:
+            requeue_stale_jobs()
+            count = run_jobs(pool, batch_size)
+            processed += count
+            if count:
+                continue
+            if once:
+                break
+            time.sleep(interval)
+    click.echo(f"{processed} tâche(s) exécutée(s).")
+
+@app.cli.command("migrate-qr-codes")
+@click.option('--batch-size', default=200, show_default=True, help='Nombre de tickets traités par lot.')
+@with_appcontext
+def migrate_qr_codes(batch_size):
+    """Déplace les QR codes base64 vers le stockage d'artefacts et vide la colonne."""
+    migrated = 0
+    last_id = 0
+    while True:
+        tickets = (Ticket.query
+                   .options(load_only(Ticket.id, Ticket.qr_code, Ticket.qr_digest))
+                   .filter(Ticket.id > last_id, Ticket.qr_code.isnot(None))
+                   .order_by(Ticket.id)
+                   .limit(batch_size)
+                   .all())
+        if not tickets:
+            break
+        for ticket in tickets:
+            ticket.migrate_legacy_qr_code()
+        last_id = tickets[-1].id
+        db.session.commit()
+        db.session.expunge_all()
+        migrated += len(tickets)
+        click.echo(f"{migrated} ticket(s) migré(s)...")
+    click.echo(f"Migration terminée : {migrated} QR code(s) déplacé(s).")
+
 if __name__ == '__main__':
     # Lancement en mode développement local
     app.run(debug=True)
@@ -0,0 +1,26 @@
+"""Empreinte du QR code dans le stockage d'artefacts
+
+Revision ID: 1f6a2c8d4e93
+Revises: e91b4d7c0f25
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1f6a2c8d4e93'
+down_revision = 'e91b4d7c0f25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('qr_digest', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_column('qr_digest')
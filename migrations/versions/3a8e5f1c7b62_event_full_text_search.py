@@ -0,0 +1,69 @@
+"""Recherche plein texte sur les événements
+
+Revision ID: 3a8e5f1c7b62
+Revises: 1f6a2c8d4e93
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from services.search import SQLITE_FTS_TABLE, SQLITE_FTS_TRIGGERS, SQLITE_FTS_REBUILD
+
+
+# revision identifiers, used by Alembic.
+revision = '3a8e5f1c7b62'
+down_revision = '1f6a2c8d4e93'
+branch_labels = None
+depends_on = None
+
+
+POSTGRESQL_UPGRADE = [
+    "ALTER TABLE event ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION event_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('french', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('french', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER event_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON event
+    FOR EACH ROW EXECUTE FUNCTION event_search_vector_update()
+    """,
+    "UPDATE event SET title = title",
+    "CREATE INDEX ix_event_search_vector ON event USING GIN (search_vector)",
+]
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_event_search_vector",
+    "DROP TRIGGER IF EXISTS event_search_vector_trigger ON event",
+    "DROP FUNCTION IF EXISTS event_search_vector_update()",
+    "ALTER TABLE event DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_UPGRADE = [SQLITE_FTS_TABLE] + SQLITE_FTS_TRIGGERS + [SQLITE_FTS_REBUILD]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS event_fts_au",
+    "DROP TRIGGER IF EXISTS event_fts_ad",
+    "DROP TRIGGER IF EXISTS event_fts_ai",
+    "DROP TABLE IF EXISTS event_fts",
+]
+
+
+def _run(statements_by_dialect):
+    statements = statements_by_dialect.get(op.get_bind().dialect.name, [])
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade():
+    _run({'postgresql': POSTGRESQL_UPGRADE, 'sqlite': SQLITE_UPGRADE})
+
+
+def downgrade():
+    _run({'postgresql': POSTGRESQL_DOWNGRADE, 'sqlite': SQLITE_DOWNGRADE})
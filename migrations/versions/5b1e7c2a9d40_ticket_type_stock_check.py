@@ -0,0 +1,33 @@
+"""Contrainte de stock sur ticket_type
+
+Revision ID: 5b1e7c2a9d40
+Revises: 403c9c9ac57c
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e7c2a9d40'
+down_revision = '403c9c9ac57c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Corriger d'éventuelles valeurs incohérentes avant d'ajouter la contrainte
+    op.execute('UPDATE ticket_type SET available_quantity = 0 WHERE available_quantity < 0')
+    op.execute('UPDATE ticket_type SET available_quantity = total_quantity '
+               'WHERE available_quantity > total_quantity')
+    with op.batch_alter_table('ticket_type', schema=None) as batch_op:
+        batch_op.create_check_constraint(
+            'ck_ticket_type_available_quantity',
+            'available_quantity >= 0 AND available_quantity <= total_quantity'
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('ticket_type', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_ticket_type_available_quantity', type_='check')
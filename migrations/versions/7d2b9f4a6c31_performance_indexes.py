@@ -0,0 +1,44 @@
+"""Index de performance pour les requêtes fréquentes
+
+Revision ID: 7d2b9f4a6c31
+Revises: 3a8e5f1c7b62
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2b9f4a6c31'
+down_revision = '3a8e5f1c7b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mes événements, dashboard : filtre organisateur + tri par date
+    op.create_index('ix_event_organizer_date', 'event', ['organizer_id', 'date'], unique=False)
+    # Page d'accueil : tri par date, filtres statut / type / lieu
+    op.create_index('ix_event_date', 'event', ['date'], unique=False)
+    op.create_index('ix_event_type_date', 'event', ['event_type', 'date'], unique=False)
+    op.create_index('ix_event_location_date', 'event', ['location', 'date'], unique=False)
+    # Historique d'achats : filtre utilisateur + tri par date d'achat
+    op.create_index('ix_ticket_user_purchase_date', 'ticket', ['user_id', 'purchase_date'], unique=False)
+    # Ventes par événement / type de ticket, export
+    op.create_index('ix_ticket_event_type', 'ticket', ['event_id', 'ticket_type_id'], unique=False)
+    # Détail d'un événement : types de tickets
+    op.create_index('ix_ticket_type_event_id', 'ticket_type', ['event_id'], unique=False)
+    # Demandes d'organisateur en attente
+    op.create_index('ix_users_organizer_request', 'users', ['organizer_request_status', 'organizer_request_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_organizer_request', table_name='users')
+    op.drop_index('ix_ticket_type_event_id', table_name='ticket_type')
+    op.drop_index('ix_ticket_event_type', table_name='ticket')
+    op.drop_index('ix_ticket_user_purchase_date', table_name='ticket')
+    op.drop_index('ix_event_location_date', table_name='event')
+    op.drop_index('ix_event_type_date', table_name='event')
+    op.drop_index('ix_event_date', table_name='event')
+    op.drop_index('ix_event_organizer_date', table_name='event')
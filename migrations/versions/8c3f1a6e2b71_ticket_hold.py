@@ -0,0 +1,45 @@
+"""Réservations temporaires de places
+
+Revision ID: 8c3f1a6e2b71
+Revises: 5b1e7c2a9d40
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3f1a6e2b71'
+down_revision = '5b1e7c2a9d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ticket_hold',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('ticket_type_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('stripe_session_id', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['event_id'], ['event.id'], ),
+    sa.ForeignKeyConstraint(['ticket_type_id'], ['ticket_type.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stripe_session_id')
+    )
+    with op.batch_alter_table('ticket_hold', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ticket_hold_expires_at'), ['expires_at'], unique=False)
+        batch_op.create_index('ix_ticket_hold_type_expires', ['ticket_type_id', 'expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ticket_hold', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_hold_type_expires')
+        batch_op.drop_index(batch_op.f('ix_ticket_hold_expires_at'))
+
+    op.drop_table('ticket_hold')
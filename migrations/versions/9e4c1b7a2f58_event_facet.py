@@ -0,0 +1,37 @@
+"""Table des facettes des filtres (types d'événements, lieux)
+
+Revision ID: 9e4c1b7a2f58
+Revises: 7d2b9f4a6c31
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4c1b7a2f58'
+down_revision = '7d2b9f4a6c31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('event_facet',
+    sa.Column('facet', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=200), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('event_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('facet', 'value', 'day')
+    )
+
+    # Initialisation à partir des événements existants
+    for facet in ('event_type', 'location'):
+        op.execute(
+            f"INSERT INTO event_facet (facet, value, day, event_count) "
+            f"SELECT '{facet}', {facet}, date(date), count(*) FROM event GROUP BY {facet}, date(date)"
+        )
+
+
+def downgrade():
+    op.drop_table('event_facet')
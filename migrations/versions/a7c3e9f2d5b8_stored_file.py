@@ -0,0 +1,44 @@
+"""Références des images téléversées
+
+Revision ID: a7c3e9f2d5b8
+Revises: f58a3b6d1c94
+Create Date: 2026-10-16 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f2d5b8'
+down_revision = 'f58a3b6d1c94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stored_file',
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('released_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    with op.batch_alter_table('stored_file', schema=None) as batch_op:
+        batch_op.create_index('ix_stored_file_unreferenced', ['ref_count', 'released_at'], unique=False)
+
+    # Initialisation à partir des images locales des événements existants
+    # (la taille est renseignée par `flask gc-uploads --recount`)
+    op.execute(
+        "INSERT INTO stored_file (name, ref_count, size_bytes, created_at) "
+        "SELECT substr(image_url, 24), count(*), 0, CURRENT_TIMESTAMP FROM event "
+        "WHERE image_url LIKE '/static/uploads/events/%' GROUP BY image_url"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('stored_file', schema=None) as batch_op:
+        batch_op.drop_index('ix_stored_file_unreferenced')
+
+    op.drop_table('stored_file')
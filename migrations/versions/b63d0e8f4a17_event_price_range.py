@@ -0,0 +1,49 @@
+"""Fourchette de prix dénormalisée sur les événements
+
+Revision ID: b63d0e8f4a17
+Revises: 9e4c1b7a2f58
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from services.search import restore_sqlite_fts_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = 'b63d0e8f4a17'
+down_revision = '9e4c1b7a2f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('min_price', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('max_price', sa.Float(), nullable=True))
+
+    # Initialisation à partir des types de tickets existants
+    op.execute(
+        "UPDATE event SET "
+        "min_price = coalesce((SELECT min(price) FROM ticket_type WHERE ticket_type.event_id = event.id), 0), "
+        "max_price = coalesce((SELECT max(price) FROM ticket_type WHERE ticket_type.event_id = event.id), 0)"
+    )
+
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.alter_column('min_price', existing_type=sa.Float(), nullable=False)
+        batch_op.alter_column('max_price', existing_type=sa.Float(), nullable=False)
+        batch_op.create_index('ix_event_min_price', ['min_price', 'id'], unique=False)
+        batch_op.create_index('ix_event_max_price', ['max_price', 'id'], unique=False)
+
+    # Sous SQLite, la reconstruction de `event` supprime les triggers de l'index plein texte
+    restore_sqlite_fts_triggers(op.get_bind())
+
+
+def downgrade():
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.drop_index('ix_event_max_price')
+        batch_op.drop_index('ix_event_min_price')
+        batch_op.drop_column('max_price')
+        batch_op.drop_column('min_price')
+
+    restore_sqlite_fts_triggers(op.get_bind())
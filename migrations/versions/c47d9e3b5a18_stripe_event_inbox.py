@@ -0,0 +1,55 @@
+"""Boîte de réception des webhooks Stripe
+
+Revision ID: c47d9e3b5a18
+Revises: 8c3f1a6e2b71
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47d9e3b5a18'
+down_revision = '8c3f1a6e2b71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stripe_event_inbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stripe_event_id', sa.String(length=255), nullable=False),
+    sa.Column('event_type', sa.String(length=100), nullable=False),
+    sa.Column('checkout_session_id', sa.String(length=255), nullable=False),
+    sa.Column('payment_intent', sa.String(length=255), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stripe_event_id')
+    )
+    with op.batch_alter_table('stripe_event_inbox', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_stripe_event_inbox_checkout_session_id'), ['checkout_session_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_stripe_event_inbox_payment_intent'), ['payment_intent'], unique=False)
+        batch_op.create_index(batch_op.f('ix_stripe_event_inbox_status'), ['status'], unique=False)
+
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stripe_session_id', sa.String(length=255), nullable=True))
+        batch_op.create_unique_constraint('uq_ticket_stripe_session_id', ['stripe_session_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_ticket_stripe_session_id', type_='unique')
+        batch_op.drop_column('stripe_session_id')
+
+    with op.batch_alter_table('stripe_event_inbox', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_stripe_event_inbox_status'))
+        batch_op.drop_index(batch_op.f('ix_stripe_event_inbox_payment_intent'))
+        batch_op.drop_index(batch_op.f('ix_stripe_event_inbox_checkout_session_id'))
+
+    op.drop_table('stripe_event_inbox')
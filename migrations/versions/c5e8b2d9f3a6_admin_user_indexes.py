@@ -0,0 +1,34 @@
+"""Index des listes d'administration des utilisateurs
+
+Revision ID: c5e8b2d9f3a6
+Revises: a7c3e9f2d5b8
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8b2d9f3a6'
+down_revision = 'a7c3e9f2d5b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_role', ['role', 'id'], unique=False)
+
+    # Index d'expression (recherche par préfixe) ; `varchar_pattern_ops` sert LIKE 'préfixe%' sous PostgreSQL
+    ops = ' varchar_pattern_ops' if op.get_bind().dialect.name == 'postgresql' else ''
+    op.create_index('ix_users_username_lower', 'users', [sa.text(f'lower(username){ops}')], unique=False)
+    op.create_index('ix_users_email_lower', 'users', [sa.text(f'lower(email){ops}')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.drop_index('ix_users_username_lower', table_name='users')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_role')
@@ -0,0 +1,66 @@
+"""Compteurs de ventes et de stock sur les événements et types de tickets
+
+Revision ID: d2f7a4c9e6b3
+Revises: b63d0e8f4a17
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from services.search import restore_sqlite_fts_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f7a4c9e6b3'
+down_revision = 'b63d0e8f4a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ticket_type', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tickets_sold', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('revenue', sa.Float(), nullable=True))
+
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tickets_sold', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('revenue', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('available_total', sa.Integer(), nullable=True))
+
+    # Initialisation à partir des ventes et du stock existants
+    op.execute(
+        "UPDATE ticket_type SET "
+        "tickets_sold = coalesce((SELECT sum(quantity) FROM ticket WHERE ticket.ticket_type_id = ticket_type.id), 0), "
+        "revenue = coalesce((SELECT sum(total_price) FROM ticket WHERE ticket.ticket_type_id = ticket_type.id), 0)"
+    )
+    op.execute(
+        "UPDATE event SET "
+        "tickets_sold = coalesce((SELECT sum(quantity) FROM ticket WHERE ticket.event_id = event.id), 0), "
+        "revenue = coalesce((SELECT sum(total_price) FROM ticket WHERE ticket.event_id = event.id), 0), "
+        "available_total = coalesce((SELECT sum(available_quantity) FROM ticket_type WHERE ticket_type.event_id = event.id), 0)"
+    )
+
+    with op.batch_alter_table('ticket_type', schema=None) as batch_op:
+        batch_op.alter_column('tickets_sold', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('revenue', existing_type=sa.Float(), nullable=False)
+
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.alter_column('tickets_sold', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('revenue', existing_type=sa.Float(), nullable=False)
+        batch_op.alter_column('available_total', existing_type=sa.Integer(), nullable=False)
+
+    # Sous SQLite, la reconstruction de `event` supprime les triggers de l'index plein texte
+    restore_sqlite_fts_triggers(op.get_bind())
+
+
+def downgrade():
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.drop_column('available_total')
+        batch_op.drop_column('revenue')
+        batch_op.drop_column('tickets_sold')
+
+    with op.batch_alter_table('ticket_type', schema=None) as batch_op:
+        batch_op.drop_column('revenue')
+        batch_op.drop_column('tickets_sold')
+
+    restore_sqlite_fts_triggers(op.get_bind())
@@ -0,0 +1,40 @@
+"""Agrégats de ventes journaliers
+
+Revision ID: f58a3b6d1c94
+Revises: d2f7a4c9e6b3
+Create Date: 2026-10-16 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f58a3b6d1c94'
+down_revision = 'd2f7a4c9e6b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_daily',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('ticket_type_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('tickets_sold', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['event.id'], ),
+    sa.ForeignKeyConstraint(['ticket_type_id'], ['ticket_type.id'], ),
+    sa.PrimaryKeyConstraint('event_id', 'ticket_type_id', 'day')
+    )
+
+    # Initialisation à partir des tickets existants
+    op.execute(
+        "INSERT INTO sales_daily (event_id, ticket_type_id, day, tickets_sold, revenue) "
+        "SELECT event_id, ticket_type_id, date(purchase_date), sum(quantity), sum(total_price) "
+        "FROM ticket GROUP BY event_id, ticket_type_id, date(purchase_date)"
+    )
+
+
+def downgrade():
+    op.drop_table('sales_daily')
@@ -1,16 +1,21 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from flask_login import UserMixin
+from sqlalchemy import func
 from werkzeug.security import generate_password_hash, check_password_hash
-import qrcode
-from io import BytesIO
 import base64
-from sqlalchemy import func
+from services.rendering import render_qr_png
+from services.artifacts import store_artifact
 
 db = SQLAlchemy()
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_organizer_request', 'organizer_request_status', 'organizer_request_date'),
+        db.Index('ix_users_role', 'role', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -121,13 +126,28 @@ class User(UserMixin, db.Model):
         """Vérifie si l'utilisateur peut gérer les organisateurs."""
         return self.role == 'super_admin'
 
+# Recherche par préfixe dans l'administration (voir services.user_admin)
+db.Index('ix_users_username_lower', func.lower(User.username).label('username_lower'),
+         postgresql_ops={'username_lower': 'varchar_pattern_ops'})
+db.Index('ix_users_email_lower', func.lower(User.email).label('email_lower'),
+         postgresql_ops={'email_lower': 'varchar_pattern_ops'})
+
 class TicketType(db.Model):
+    __table_args__ = (
+        db.CheckConstraint('available_quantity >= 0 AND available_quantity <= total_quantity',
+                           name='ck_ticket_type_available_quantity'),
+        db.Index('ix_ticket_type_event_id', 'event_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)  # VIP, Standard, etc.
     price = db.Column(db.Float, nullable=False)
     total_quantity = db.Column(db.Integer, nullable=False)
     available_quantity = db.Column(db.Integer, nullable=False)
+    # Compteurs de ventes, tenus à jour par services.sales
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
     
     # Relations
     tickets = db.relationship('Ticket', backref='ticket_type', lazy=True)
@@ -137,17 +157,26 @@ class TicketType(db.Model):
 
     def get_tickets_sold(self):
         """Retourne le nombre de tickets vendus pour ce type."""
-        return self.total_quantity - self.available_quantity
+        return self.tickets_sold
 
     def get_revenue(self):
         """Retourne le revenu total pour ce type de ticket."""
-        return self.get_tickets_sold() * self.price
+        return self.revenue
 
     def is_available(self, quantity=1):
         """Vérifie si le nombre de tickets demandé est disponible."""
         return self.available_quantity >= quantity
 
 class Event(db.Model):
+    __table_args__ = (
+        db.Index('ix_event_organizer_date', 'organizer_id', 'date'),
+        db.Index('ix_event_date', 'date'),
+        db.Index('ix_event_type_date', 'event_type', 'date'),
+        db.Index('ix_event_location_date', 'location', 'date'),
+        db.Index('ix_event_min_price', 'min_price', 'id'),
+        db.Index('ix_event_max_price', 'max_price', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -157,6 +186,13 @@ class Event(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     image_url = db.Column(db.String(255), nullable=True)
     organizer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # Fourchette de prix des types de tickets, tenue à jour par services.pricing
+    min_price = db.Column(db.Float, nullable=False, default=0)
+    max_price = db.Column(db.Float, nullable=False, default=0)
+    # Compteurs de ventes et de stock, tenus à jour par services.sales et services.inventory
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    available_total = db.Column(db.Integer, nullable=False, default=0)
     
     # Relations
     tickets = db.relationship('Ticket', backref='event', lazy=True)
@@ -214,15 +250,15 @@ class Event(db.Model):
 
     def get_total_tickets_sold(self):
         """Retourne le nombre total de tickets vendus pour l'événement."""
-        return db.session.query(func.sum(Ticket.quantity)).filter_by(event_id=self.id).scalar() or 0
+        return self.tickets_sold
 
     def get_total_revenue(self):
         """Retourne le revenu total de l'événement."""
-        return db.session.query(func.sum(Ticket.total_price)).filter_by(event_id=self.id).scalar() or 0
+        return self.revenue
 
     def get_available_tickets(self):
         """Retourne le nombre total de tickets disponibles."""
-        return sum(ticket_type.available_quantity for ticket_type in self.ticket_types)
+        return self.available_total
 
     def get_total_tickets(self):
         """Retourne le nombre total de tickets."""
@@ -237,6 +273,11 @@ class Event(db.Model):
         return self.get_total_tickets_sold() == 0
 
 class Ticket(db.Model):
+    __table_args__ = (
+        db.Index('ix_ticket_user_purchase_date', 'user_id', 'purchase_date'),
+        db.Index('ix_ticket_event_type', 'event_id', 'ticket_type_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -247,32 +288,45 @@ class Ticket(db.Model):
     payment_status = db.Column(db.String(20), nullable=False, default='en_attente')
     payment_reference = db.Column(db.String(100), nullable=True)
     payment_date = db.Column(db.DateTime, nullable=True)
-    qr_code = db.Column(db.Text, nullable=True)
+    stripe_session_id = db.Column(db.String(255), nullable=True, unique=True)
+    qr_code = db.Column(db.Text, nullable=True)  # Ancien stockage base64, vidé par `flask migrate-qr-codes`
+    qr_digest = db.Column(db.String(64), nullable=True)  # Empreinte du PNG dans le stockage d'artefacts
 
-    def generate_qr_code(self):
-        # Créer les données pour le QR code
+    def get_qr_data(self):
+        """Retourne les données encodées dans le QR code du ticket."""
         ticket_data = {
             'ticket_id': self.id,
             'event_id': self.event_id,
             'user_id': self.user_id,
             'purchase_date': self.purchase_date.isoformat()
         }
-        
-        # Générer le QR code
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(str(ticket_data))
-        qr.make(fit=True)
-        
-        # Créer l'image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convertir en base64
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        
-        self.qr_code = img_str
-        return img_str
+        return str(ticket_data)
+
+    def generate_qr_code(self):
+        """Génère le QR code du ticket et l'enregistre dans le stockage d'artefacts."""
+        self.qr_digest = store_artifact(render_qr_png(self.get_qr_data()), '.png')
+        return self.qr_digest
+
+    def migrate_legacy_qr_code(self):
+        """Déplace l'ancien QR code base64 vers le stockage d'artefacts."""
+        if self.qr_code:
+            self.qr_digest = store_artifact(base64.b64decode(self.qr_code), '.png')
+            self.qr_code = None
+        return self.qr_digest
+
+    def get_pdf_info(self):
+        """Retourne les informations nécessaires au rendu PDF du ticket."""
+        return {
+            'event_title': self.event.title,
+            'event_date': self.event.date.strftime('%d/%m/%Y %H:%M'),
+            'event_location': self.event.location,
+            'ticket_type': self.ticket_type.name,
+            'quantity': self.quantity,
+            'total_price': self.total_price,
+            'purchase_date': self.purchase_date.strftime('%d/%m/%Y %H:%M'),
+            'payment_status': self.payment_status,
+            'qr_data': f"Ticket ID: {self.id}\nEvent: {self.event.title}\nUser: {self.user.username}"
+        }
 
     def __repr__(self):
         return f'<Ticket {self.id} for Event {self.event_id}>'
@@ -287,4 +341,124 @@ class Ticket(db.Model):
 
     def is_pending(self):
         """Vérifie si le ticket est en attente de paiement."""
-        return self.payment_status == 'en_attente' 
\ No newline at end of file
+        return self.payment_status == 'en_attente'
+
+class TicketHold(db.Model):
+    """Réservation temporaire de places entre la création du paiement et sa confirmation."""
+    __tablename__ = 'ticket_hold'
+    __table_args__ = (
+        db.Index('ix_ticket_hold_type_expires', 'ticket_type_id', 'expires_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    ticket_type_id = db.Column(db.Integer, db.ForeignKey('ticket_type.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    stripe_session_id = db.Column(db.String(255), nullable=True, unique=True)
+
+    def __repr__(self):
+        return f'<TicketHold {self.id} ({self.quantity} x TicketType {self.ticket_type_id})>'
+
+    def is_expired(self):
+        """Vérifie si la réservation a expiré."""
+        return self.expires_at <= datetime.utcnow()
+
+class StripeEvent(db.Model):
+    """Boîte de réception des webhooks Stripe, traitée par le worker de commandes."""
+    __tablename__ = 'stripe_event_inbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    stripe_event_id = db.Column(db.String(255), nullable=False, unique=True)
+    event_type = db.Column(db.String(100), nullable=False)
+    checkout_session_id = db.Column(db.String(255), nullable=False, index=True)
+    payment_intent = db.Column(db.String(255), nullable=True, index=True)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='reçu', index=True)  # 'reçu', 'traité', 'remboursé', 'erreur'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<StripeEvent {self.stripe_event_id} ({self.event_type})>'
+
+    def is_pending(self):
+        """Vérifie si l'événement attend encore d'être traité."""
+        return self.status == 'reçu'
+
+class Job(db.Model):
+    """Tâche de fond exécutée par `flask worker` (rendus QR, PDF, ...)."""
+    __tablename__ = 'job'
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    key = db.Column(db.String(100), nullable=True, index=True)  # Clé de déduplication, ex. 'ticket_pdf:42'
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='en_attente')  # 'en_attente', 'en_cours', 'terminé', 'échec'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} ({self.status})>'
+
+    def is_active(self):
+        """Vérifie si la tâche est en attente ou en cours d'exécution."""
+        return self.status in ('en_attente', 'en_cours')
+
+class EventFacet(db.Model):
+    """Nombre d'événements par valeur de filtre (type, lieu) et par jour.
+
+    Le découpage par jour permet de compter les événements à venir sans
+    parcourir la table `event`.
+    """
+    __tablename__ = 'event_facet'
+
+    facet = db.Column(db.String(20), primary_key=True)  # 'event_type', 'location'
+    value = db.Column(db.String(200), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<EventFacet {self.facet}={self.value} {self.day}: {self.event_count}>'
+
+class SalesDaily(db.Model):
+    """Ventes agrégées par événement, type de ticket et jour d'achat."""
+    __tablename__ = 'sales_daily'
+
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), primary_key=True)
+    ticket_type_id = db.Column(db.Integer, db.ForeignKey('ticket_type.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SalesDaily Event {self.event_id} TicketType {self.ticket_type_id} {self.day}>'
+
+class StoredFile(db.Model):
+    """Image téléversée (nommée par empreinte) et nombre d'événements qui la référencent."""
+    __tablename__ = 'stored_file'
+
+    name = db.Column(db.String(255), primary_key=True)  # Nom dans UPLOAD_FOLDER
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)  # Toutes variantes comprises
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    released_at = db.Column(db.DateTime, nullable=True)  # Dernière libération d'une référence
+
+    __table_args__ = (
+        db.Index('ix_stored_file_unreferenced', 'ref_count', 'released_at'),
+    )
+
+    def __repr__(self):
+        return f'<StoredFile {self.name} ({self.ref_count} réf.)>'
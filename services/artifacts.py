@@ -0,0 +1,33 @@
+"""Stockage de fichiers adressé par contenu (nom = empreinte SHA-256).
+
+Un même contenu n'est écrit qu'une seule fois et l'empreinte sert
+directement d'ETag fort lors de la diffusion.
+"""
+import hashlib
+import os
+from flask import current_app
+
+
+def artifact_path(digest, extension):
+    """Retourne le chemin d'un artefact à partir de son empreinte."""
+    root = current_app.config['ARTIFACT_FOLDER']
+    return os.path.join(root, digest[:2], digest[2:4], f"{digest}{extension}")
+
+
+def store_artifact(data, extension):
+    """Enregistre `data` (bytes) et retourne son empreinte SHA-256."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = artifact_path(digest, extension)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Écriture atomique : un lecteur concurrent ne voit jamais un fichier partiel
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return digest
+
+
+def has_artifact(digest, extension):
+    """Vérifie si un artefact est présent dans le stockage."""
+    return bool(digest) and os.path.exists(artifact_path(digest, extension))
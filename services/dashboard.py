@@ -0,0 +1,77 @@
+"""Agrégation des statistiques du tableau de bord organisateur.
+
+Une seule requête groupée par événement : les ventes et le stock viennent
+des compteurs stockés sur `event` (voir services.sales), la capacité de
+la jointure sur `ticket_type`. Les totaux sont calculés à partir des
+lignes, sans requête supplémentaire.
+
+Les séries temporelles et l'export CSV lisent l'agrégat `sales_daily`.
+"""
+from datetime import date, timedelta
+from sqlalchemy import func, select
+from models import db, Event, SalesDaily, TicketType
+
+
+def organizer_dashboard(organizer_id):
+    """Retourne {'events': [...], 'totals': {...}} pour un organisateur."""
+    rows = db.session.execute(
+        select(Event.id, Event.title, Event.date,
+               Event.tickets_sold, Event.revenue, Event.available_total,
+               func.coalesce(func.sum(TicketType.total_quantity), 0).label('capacity'),
+               func.count(TicketType.id).label('ticket_types'))
+        .outerjoin(TicketType, TicketType.event_id == Event.id)
+        .where(Event.organizer_id == organizer_id)
+        .group_by(Event.id)
+        .order_by(Event.date.desc(), Event.id.desc())
+    ).all()
+
+    events = [{
+        'id': row.id,
+        'title': row.title,
+        'date': row.date.isoformat(),
+        'tickets_sold': row.tickets_sold,
+        'revenue': row.revenue,
+        'available': row.available_total,
+        'capacity': row.capacity,
+        'ticket_types': row.ticket_types,
+    } for row in rows]
+
+    totals = {
+        'events': len(events),
+        'tickets_sold': sum(e['tickets_sold'] for e in events),
+        'revenue': sum(e['revenue'] for e in events),
+        'available': sum(e['available'] for e in events),
+        'capacity': sum(e['capacity'] for e in events),
+    }
+    return {'events': events, 'totals': totals}
+
+
+def organizer_daily_sales(organizer_id, days=30):
+    """Retourne les ventes jour par jour des `days` derniers jours (jours sans vente inclus)."""
+    since = date.today() - timedelta(days=days - 1)
+    rows = db.session.execute(
+        select(SalesDaily.day, func.sum(SalesDaily.tickets_sold), func.sum(SalesDaily.revenue))
+        .join(Event, Event.id == SalesDaily.event_id)
+        .where(Event.organizer_id == organizer_id, SalesDaily.day >= since)
+        .group_by(SalesDaily.day)
+    ).all()
+    sales = {row[0]: (row[1], row[2]) for row in rows}
+
+    series = []
+    for offset in range(days):
+        day = since + timedelta(days=offset)
+        tickets_sold, revenue = sales.get(day, (0, 0))
+        series.append({'day': day.isoformat(), 'tickets_sold': tickets_sold, 'revenue': revenue})
+    return series
+
+
+def organizer_sales_rows(organizer_id, since=None):
+    """Itère sur les ventes journalières (jour, événement, type de ticket, tickets, revenu)."""
+    query = (select(SalesDaily.day, Event.title, TicketType.name, SalesDaily.tickets_sold, SalesDaily.revenue)
+             .join(Event, Event.id == SalesDaily.event_id)
+             .join(TicketType, TicketType.id == SalesDaily.ticket_type_id)
+             .where(Event.organizer_id == organizer_id)
+             .order_by(SalesDaily.day, Event.title, TicketType.name))
+    if since is not None:
+        query = query.where(SalesDaily.day >= since)
+    return db.session.execute(query.execution_options(yield_per=500))
@@ -0,0 +1,142 @@
+"""Facettes des filtres de la page d'accueil (types d'événements, lieux).
+
+La table `event_facet` tient le nombre d'événements par valeur et par
+jour ; elle est mise à jour de façon incrémentale à la création, la
+modification et la suppression d'un événement. Les listes déroulantes
+sont servies depuis un cache mémoire (durée de vie `FACET_CACHE_TTL`),
+vidé explicitement après chaque écriture. Dans les autres processus, la
+durée de vie borne le retard des facettes.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, literal, select, union_all, update
+from models import db, Event, EventFacet
+from services.sql import upsert
+
+FACETS = ('event_type', 'location')
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def facet_snapshot(event):
+    """Retourne les valeurs de l'événement qui alimentent les facettes."""
+    return {'event_type': event.event_type, 'location': event.location, 'day': event.date.date()}
+
+
+def _increment(snapshot):
+    statement = upsert(EventFacet).values([
+        {'facet': facet, 'value': snapshot[facet], 'day': snapshot['day'], 'event_count': 1}
+        for facet in FACETS
+    ])
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['facet', 'value', 'day'],
+        set_={'event_count': EventFacet.event_count + statement.excluded.event_count}
+    ))
+
+
+def _decrement(snapshot):
+    for facet in FACETS:
+        key = (EventFacet.facet == facet, EventFacet.value == snapshot[facet], EventFacet.day == snapshot['day'])
+        db.session.execute(
+            update(EventFacet).where(*key)
+            .values(event_count=EventFacet.event_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            delete(EventFacet).where(*key, EventFacet.event_count <= 0)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def record_event_created(event):
+    """Compte un nouvel événement dans les facettes."""
+    _increment(facet_snapshot(event))
+
+
+def record_event_updated(previous, event):
+    """Déplace un événement modifié ; `previous` vient de `facet_snapshot` avant modification."""
+    current = facet_snapshot(event)
+    if current != previous:
+        _decrement(previous)
+        _increment(current)
+
+
+def record_event_deleted(previous):
+    """Retire des facettes un événement supprimé."""
+    _decrement(previous)
+
+
+def rebuild_facets():
+    """Recalcule entièrement la table des facettes à partir de `event`."""
+    db.session.execute(delete(EventFacet))
+    day = func.date(Event.date)
+    for facet in FACETS:
+        column = getattr(Event, facet)
+        db.session.execute(
+            EventFacet.__table__.insert().from_select(
+                ['facet', 'value', 'day', 'event_count'],
+                select(literal(facet), column, day, func.count()).group_by(column, day)
+            )
+        )
+    db.session.commit()
+    invalidate_facets()
+
+
+def _load_facets(upcoming_only):
+    if upcoming_only:
+        # Même borne que le filtre « à venir » de la liste (`Event.date > now`) :
+        # les jours suivants viennent de `event_facet`, aujourd'hui de `event`
+        now = datetime.now()
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        parts = [select(EventFacet.facet, EventFacet.value, EventFacet.event_count)
+                 .where(EventFacet.day >= tomorrow.date())]
+        for facet in FACETS:
+            column = getattr(Event, facet)
+            parts.append(select(literal(facet), column, func.count())
+                         .where(Event.date > now, Event.date < tomorrow)
+                         .group_by(column))
+        rows = union_all(*parts).subquery()
+        query = (select(rows.c.facet, rows.c.value, func.sum(rows.c.event_count))
+                 .group_by(rows.c.facet, rows.c.value)
+                 .order_by(rows.c.facet, rows.c.value))
+    else:
+        query = (select(EventFacet.facet, EventFacet.value, func.sum(EventFacet.event_count))
+                 .group_by(EventFacet.facet, EventFacet.value)
+                 .order_by(EventFacet.facet, EventFacet.value))
+
+    facets = {facet: [] for facet in FACETS}
+    for facet, value, count in db.session.execute(query):
+        if count:
+            facets[facet].append((value, count))
+    return facets
+
+
+def get_facets(upcoming_only=False):
+    """Retourne {'event_type': [(valeur, nombre)], 'location': [...]} depuis le cache.
+
+    Avec `upcoming_only`, seuls les événements postérieurs à l'instant
+    présent sont comptés, comme dans le filtre « à venir » de la liste ;
+    dans le cache, ces nombres peuvent retarder de `FACET_CACHE_TTL`.
+    """
+    key = (upcoming_only, date.today())
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    facets = _load_facets(upcoming_only)
+    with _cache_lock:
+        for stale in [k for k in _cache if k[1] != key[1]]:
+            del _cache[stale]
+        _cache[key] = (now + current_app.config.get('FACET_CACHE_TTL', 300), facets)
+    return facets
+
+
+def invalidate_facets():
+    """Vide le cache des facettes (à appeler après la validation d'une écriture)."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,157 @@
+import json
+from datetime import datetime
+import stripe
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from models import db, Ticket, TicketHold, StripeEvent
+from services.inventory import reserve_stock
+from services.holds import consume_hold, release_hold
+from services.sales import record_sale
+from services.ticket_jobs import enqueue_ticket_rendering
+
+# Événements Stripe enregistrés dans la boîte de réception
+HANDLED_EVENT_TYPES = {
+    'checkout.session.completed',
+    'checkout.session.async_payment_succeeded',
+    'checkout.session.expired',
+}
+MAX_ATTEMPTS = 5
+
+
+def record_stripe_event(event):
+    """Enregistre un événement Stripe vérifié dans la boîte de réception.
+
+    Retourne True si l'événement est nouveau, False s'il a déjà été reçu
+    (la contrainte d'unicité sur l'identifiant Stripe rend l'appel idempotent).
+    Une même session peut recevoir plusieurs événements (paiement différé) :
+    l'émission unique du ticket repose sur `ticket.stripe_session_id`.
+    """
+    session = event['data']['object']
+    inbox = StripeEvent(
+        stripe_event_id=event['id'],
+        event_type=event['type'],
+        checkout_session_id=session['id'],
+        payment_intent=session.get('payment_intent'),
+        payload=json.dumps(session)
+    )
+    db.session.add(inbox)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+
+def fulfill_event(inbox):
+    """Traite un événement de la boîte de réception (le commit est laissé à l'appelant).
+
+    Retourne le ticket créé, ou None si aucun ticket n'a été émis.
+    """
+    session = json.loads(inbox.payload)
+    metadata = session.get('metadata') or {}
+    hold_id = metadata.get('hold_id')
+
+    if inbox.event_type == 'checkout.session.expired':
+        hold = db.session.get(TicketHold, int(hold_id)) if hold_id else None
+        if hold:
+            release_hold(hold)
+        inbox.status = 'traité'
+        inbox.processed_at = datetime.utcnow()
+        return None
+
+    if session.get('payment_status') != 'paid':
+        # Paiement différé : Stripe enverra async_payment_succeeded plus tard
+        inbox.status = 'traité'
+        inbox.processed_at = datetime.utcnow()
+        return None
+
+    # Commande déjà honorée par un autre événement de la même session
+    if Ticket.query.filter_by(stripe_session_id=session['id']).first():
+        inbox.status = 'traité'
+        inbox.processed_at = datetime.utcnow()
+        return None
+
+    ticket_type_id = int(metadata['ticket_type_id'])
+    quantity = int(metadata['quantity'])
+
+    # Consommer la réservation, ou décrémenter le stock si elle a expiré entre-temps
+    if not (hold_id and consume_hold(int(hold_id))) and not reserve_stock(ticket_type_id, quantity):
+        # Le remboursement part avant le commit : la clé d'idempotence évite
+        # un second remboursement si le commit échoue et que l'événement est rejoué
+        stripe.Refund.create(
+            payment_intent=session.get('payment_intent'),
+            idempotency_key=f"refund:{session['id']}"
+        )
+        inbox.status = 'remboursé'
+        inbox.processed_at = datetime.utcnow()
+        return None
+
+    ticket = Ticket(
+        user_id=int(metadata['user_id']),
+        event_id=int(metadata['event_id']),
+        ticket_type_id=ticket_type_id,
+        quantity=quantity,
+        total_price=session['amount_total'] / 100,  # Convertir les centimes en euros
+        payment_status='payé',
+        payment_reference=session.get('payment_intent'),
+        payment_date=datetime.now(),
+        purchase_date=datetime.now(),
+        stripe_session_id=session['id']
+    )
+    db.session.add(ticket)
+    db.session.flush()  # Pour obtenir l'ID du ticket
+    record_sale(ticket)
+
+    # Le QR code et le PDF sont générés par le worker
+    enqueue_ticket_rendering(ticket)
+    inbox.status = 'traité'
+    inbox.processed_at = datetime.utcnow()
+    return ticket
+
+
+def process_next_event():
+    """Réclame et traite un événement en attente.
+
+    Retourne False lorsqu'il n'y a plus rien à traiter. Sous PostgreSQL,
+    `SKIP LOCKED` permet de lancer plusieurs workers en parallèle.
+    """
+    inbox = db.session.scalars(
+        select(StripeEvent)
+        .where(StripeEvent.status == 'reçu')
+        .order_by(StripeEvent.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
+    if inbox is None:
+        db.session.rollback()
+        return False
+
+    inbox_id = inbox.id
+    try:
+        fulfill_event(inbox)
+        db.session.commit()
+    except IntegrityError:
+        # Un ticket existe déjà pour cette session : la commande est déjà honorée
+        db.session.rollback()
+        _mark_event(inbox_id, 'traité')
+        return True
+    except Exception as e:
+        db.session.rollback()
+        _mark_event(inbox_id, None, error=str(e))
+        return True
+    return True
+
+
+def _mark_event(inbox_id, status, error=None):
+    """Met à jour le statut d'un événement après un échec de traitement."""
+    inbox = db.session.get(StripeEvent, inbox_id)
+    inbox.attempts += 1
+    if error is not None:
+        inbox.last_error = error
+        if inbox.attempts >= MAX_ATTEMPTS:
+            inbox.status = 'erreur'
+    if status is not None:
+        inbox.status = status
+        inbox.processed_at = datetime.utcnow()
+    db.session.commit()
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select
+from models import db, TicketHold
+from services.inventory import reserve_stock, release_stock
+from services.page_cache import EVENT_LIST_TAG, event_tag, mark_stale
+
+DEFAULT_HOLD_TTL = timedelta(minutes=30)
+
+
+def create_hold(event_id, ticket_type_id, user_id, quantity, ttl=DEFAULT_HOLD_TTL):
+    """Réserve des places pour une durée limitée.
+
+    Le stock est décrémenté immédiatement : `available_quantity` reflète donc
+    déjà les réservations actives. Retourne la réservation, ou None si le
+    stock est insuffisant. Le commit est laissé à l'appelant.
+    """
+    # Récupérer d'abord les places des réservations expirées de ce type
+    release_expired_holds(ticket_type_id=ticket_type_id)
+
+    if not reserve_stock(ticket_type_id, quantity):
+        return None
+
+    hold = TicketHold(
+        event_id=event_id,
+        ticket_type_id=ticket_type_id,
+        user_id=user_id,
+        quantity=quantity,
+        expires_at=datetime.utcnow() + ttl
+    )
+    db.session.add(hold)
+    db.session.flush()
+    mark_stale(EVENT_LIST_TAG, event_tag(event_id))
+    return hold
+
+
+def consume_hold(hold_id):
+    """Consomme une réservation lors de la confirmation du paiement.
+
+    Retourne True si la réservation existait encore (les places restent
+    décomptées), False si elle a déjà été libérée.
+    """
+    result = db.session.execute(
+        delete(TicketHold)
+        .where(TicketHold.id == hold_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def release_hold(hold):
+    """Libère une réservation et remet ses places en stock."""
+    result = db.session.execute(
+        delete(TicketHold)
+        .where(TicketHold.id == hold.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    release_stock(hold.ticket_type_id, hold.quantity)
+    mark_stale(EVENT_LIST_TAG, event_tag(hold.event_id))
+    return True
+
+
+def has_active_holds(event_id, now=None):
+    """Vérifie si un paiement est en cours (réservation non expirée) pour l'événement."""
+    now = now or datetime.utcnow()
+    return db.session.scalar(
+        select(TicketHold.id)
+        .where(TicketHold.event_id == event_id, TicketHold.expires_at > now)
+        .limit(1)
+    ) is not None
+
+
+def release_expired_holds(ticket_type_id=None, event_id=None, batch_size=500, now=None):
+    """Libère un lot de réservations expirées via l'index sur `expires_at`.
+
+    Retourne le nombre de réservations libérées. Le commit est laissé à l'appelant.
+    """
+    now = now or datetime.utcnow()
+    query = select(TicketHold).where(TicketHold.expires_at <= now)
+    if ticket_type_id is not None:
+        query = query.where(TicketHold.ticket_type_id == ticket_type_id)
+    if event_id is not None:
+        query = query.where(TicketHold.event_id == event_id)
+    expired = db.session.scalars(query.order_by(TicketHold.expires_at).limit(batch_size)).all()
+
+    released = 0
+    for hold in expired:
+        if release_hold(hold):
+            released += 1
+    return released
+
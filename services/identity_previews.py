@@ -0,0 +1,103 @@
+"""Aperçus des pièces d'identité pour la revue des demandes d'organisateur.
+
+La page d'administration n'affiche plus les originaux (JPG, PNG ou PDF,
+jusqu'à 5 Mo chacun) : elle charge des miniatures JPEG générées à la
+première consultation, la première page pour un PDF. Les aperçus sont
+conservés dans `IDENTITY_PREVIEW_FOLDER`, hors du dossier `static`, et
+servis par une route réservée aux administrateurs. Leur nom dérive du
+chemin, de la date de modification et de la taille de l'original : un
+document remplacé produit un nouvel aperçu.
+
+Le rendu des PDF utilise `pypdfium2` ; sans ce paquet, ou pour un
+fichier illisible, un visuel générique est produit à la place.
+"""
+import hashlib
+import os
+import tempfile
+from flask import current_app
+from PIL import Image, ImageDraw, ImageOps, UnidentifiedImageError
+from werkzeug.security import safe_join
+
+URL_PREFIX = '/static/uploads/identity_docs/'
+PREVIEW_SIZE = (640, 640)
+JPEG_QUALITY = 75
+
+
+def identity_document_path(url):
+    """Retourne le chemin absolu du document désigné par l'URL enregistrée, ou None."""
+    if not url or not url.startswith(URL_PREFIX):
+        return None
+    path = safe_join(current_app.config['UPLOAD_FOLDER_IDENTITY'], url[len(URL_PREFIX):])
+    if path is None or not os.path.isfile(path):
+        return None
+    return os.path.abspath(path)
+
+
+def _placeholder(label):
+    image = Image.new('RGB', (PREVIEW_SIZE[0], PREVIEW_SIZE[0] * 2 // 3), '#e9ecef')
+    draw = ImageDraw.Draw(image)
+    left, top, right, bottom = draw.textbbox((0, 0), label, font_size=48)
+    draw.text(((image.width - right + left) / 2, (image.height - bottom + top) / 2), label,
+              fill='#6c757d', font_size=48)
+    return image
+
+
+def _render_pdf(path):
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        return _placeholder('PDF')
+    try:
+        pdf = pdfium.PdfDocument(path)
+    except pdfium.PdfiumError:
+        return _placeholder('Illisible')
+    try:
+        page = pdf[0]
+        return page.render(scale=PREVIEW_SIZE[0] / page.get_width()).to_pil()
+    finally:
+        pdf.close()
+
+
+def _render(path):
+    if path.lower().endswith('.pdf'):
+        image = _render_pdf(path).convert('RGB')
+    else:
+        try:
+            image = Image.open(path)
+            image.draft('RGB', PREVIEW_SIZE)  # Décodage JPEG directement à taille réduite
+            # La conversion décode l'image : un fichier tronqué échoue ici
+            image = ImageOps.exif_transpose(image).convert('RGB')
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+            image = _placeholder('Illisible')
+    image.thumbnail(PREVIEW_SIZE, Image.LANCZOS)
+    return image
+
+
+def preview_path(source):
+    """Chemin de l'aperçu d'un document (qu'il existe ou non)."""
+    stat = os.stat(source)
+    key = hashlib.sha256(f'{source}:{stat.st_mtime_ns}:{stat.st_size}:{PREVIEW_SIZE}'.encode()).hexdigest()[:32]
+    return os.path.join(current_app.config['IDENTITY_PREVIEW_FOLDER'], key[:2], f'{key}.jpg')
+
+
+def get_preview(url):
+    """Retourne le chemin de l'aperçu du document `url`, généré au besoin ; None si le document manque."""
+    source = identity_document_path(url)
+    if source is None:
+        return None
+    target = preview_path(source)
+    if os.path.exists(target):
+        return target
+
+    image = _render(source)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Écriture atomique : une requête concurrente ne lit jamais un aperçu partiel
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            image.save(tmp, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return target
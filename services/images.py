@@ -0,0 +1,106 @@
+"""Traitement des images d'événements téléversées.
+
+Chaque image est décodée (ce qui rejette les fichiers invalides),
+redressée selon son orientation EXIF puis réencodée sans métadonnées en
+plusieurs largeurs, au format d'origine (JPEG, ou PNG si transparence)
+et en WebP. Les fichiers sont nommés d'après l'empreinte du contenu
+d'origine et la largeur :
+
+    static/uploads/events/<empreinte>-<largeur>w.jpg|png|webp
+
+`Event.image_url` désigne la plus grande variante ; les plus petites se
+déduisent de son nom, ce qui permet aux templates de produire `srcset`.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from io import BytesIO
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+WIDTHS = (320, 640, 1280)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+VARIANT_PATTERN = re.compile(r'^(?P<stem>[0-9a-f]{16})-(?P<width>\d+)w\.(?P<ext>jpg|png)$')
+
+
+class InvalidImage(ValueError):
+    """Le fichier téléversé n'est pas une image exploitable."""
+
+
+def _save_atomic(image, path, **params):
+    try:
+        # Contenu déjà présent : la date rafraîchie le protège du ramasse-miettes
+        os.utime(path)
+        return
+    except FileNotFoundError:
+        pass
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            image.save(tmp, **params)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def process_image(data, folder):
+    """Génère les variantes d'une image ; retourne le nom de fichier de la plus grande."""
+    try:
+        image = Image.open(BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise InvalidImage(str(e)) from e
+
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    ext, fallback = ('png', {'format': 'PNG', 'optimize': True}) if has_alpha else \
+        ('jpg', {'format': 'JPEG', 'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True})
+
+    stem = hashlib.sha256(data).hexdigest()[:16]
+    widths = sorted({w for w in WIDTHS if w < image.width} | {min(image.width, WIDTHS[-1])})
+    os.makedirs(folder, exist_ok=True)
+    for width in widths:
+        if width == image.width:
+            variant = image
+        else:
+            variant = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        _save_atomic(variant, os.path.join(folder, f'{stem}-{width}w.{ext}'), **fallback)
+        _save_atomic(variant, os.path.join(folder, f'{stem}-{width}w.webp'), format='WEBP', quality=WEBP_QUALITY)
+    return f'{stem}-{widths[-1]}w.{ext}'
+
+
+def variant_files(filename):
+    """Retourne les noms de toutes les variantes d'une image traitée (ou [filename])."""
+    match = VARIANT_PATTERN.match(filename)
+    if not match:
+        return [filename]
+    stem, largest, ext = match['stem'], int(match['width']), match['ext']
+    widths = [w for w in WIDTHS if w < largest] + [largest]
+    return [f'{stem}-{w}w.{e}' for w in widths for e in (ext, 'webp')]
+
+
+def image_variants(url):
+    """Retourne {'src', 'srcset', 'webp_srcset', 'smallest'} pour une URL d'image traitée.
+
+    Pour une image non traitée (ancien téléversement), seul `src` est renseigné.
+    """
+    if not url:
+        return None
+    base, _, filename = url.rpartition('/')
+    match = VARIANT_PATTERN.match(filename)
+    if not match:
+        return {'src': url, 'srcset': None, 'webp_srcset': None, 'smallest': url}
+
+    stem, largest, ext = match['stem'], int(match['width']), match['ext']
+    widths = [w for w in WIDTHS if w < largest] + [largest]
+    return {
+        'src': url,
+        'srcset': ', '.join(f'{base}/{stem}-{w}w.{ext} {w}w' for w in widths),
+        'webp_srcset': ', '.join(f'{base}/{stem}-{w}w.webp {w}w' for w in widths),
+        'smallest': f'{base}/{stem}-{widths[0]}w.{ext}',
+    }
+
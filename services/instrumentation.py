@@ -0,0 +1,126 @@
+"""Instrumentation SQL par requête HTTP.
+
+Des hooks SQLAlchemy comptent les requêtes et cumulent leur durée dans
+`g` pendant chaque requête HTTP. À la fin de la requête :
+
+- l'en-tête `Server-Timing` expose le temps base de données et le temps total ;
+- un résumé glissant par route (p50/p95, nombre de requêtes) est tenu en
+  mémoire sur les `ROUTE_STATS_WINDOW` dernières requêtes du processus ;
+- les requêtes plus lentes que `SLOW_QUERY_THRESHOLD_MS` sont journalisées
+  (instruction et paramètres), avec un taux d'échantillonnage
+  `SLOW_QUERY_SAMPLE_RATE`.
+"""
+import logging
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+MAX_LOGGED_PARAMETERS = 500
+
+_route_stats = defaultdict(deque)
+_stats_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+        g.query_time = g.get('query_time', 0.0) + elapsed
+
+    if not has_app_context():
+        return
+    config = current_app.config
+    if elapsed * 1000 >= config['SLOW_QUERY_THRESHOLD_MS'] and random.random() < config['SLOW_QUERY_SAMPLE_RATE']:
+        logger.warning(
+            "Requête SQL lente (%.1f ms) sur %s : %s ; paramètres : %s",
+            elapsed * 1000,
+            request.endpoint if has_request_context() else 'cli',
+            statement,
+            repr(parameters)[:MAX_LOGGED_PARAMETERS]
+        )
+
+
+def _handle_error(context):
+    # Une requête en échec n'atteint pas after_cursor_execute
+    starts = context.connection.info.get('query_start') if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def _start_request():
+    g.request_start = time.perf_counter()
+    g.query_count = 0
+    g.query_time = 0.0
+
+
+def _finish_request(response):
+    if 'request_start' not in g:
+        return response
+    duration = time.perf_counter() - g.request_start
+    query_count, query_time = g.get('query_count', 0), g.get('query_time', 0.0)
+
+    if current_app.config['SERVER_TIMING']:
+        response.headers.add('Server-Timing', f'db;dur={query_time * 1000:.1f};desc="{query_count} SQL"')
+        response.headers.add('Server-Timing', f'app;dur={duration * 1000:.1f}')
+
+    if request.endpoint:
+        window = current_app.config['ROUTE_STATS_WINDOW']
+        with _stats_lock:
+            samples = _route_stats[request.endpoint]
+            samples.append((duration, query_time, query_count))
+            while len(samples) > window:
+                samples.popleft()
+    return response
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def route_summary():
+    """Retourne le résumé glissant par route : durées et temps SQL (ms), nombre de requêtes."""
+    with _stats_lock:
+        snapshot = {endpoint: list(samples) for endpoint, samples in _route_stats.items()}
+
+    summary = {}
+    for endpoint, samples in sorted(snapshot.items()):
+        durations = [s[0] * 1000 for s in samples]
+        db_times = [s[1] * 1000 for s in samples]
+        counts = [s[2] for s in samples]
+        summary[endpoint] = {
+            'requests': len(samples),
+            'p50_ms': round(_percentile(durations, 0.50), 1),
+            'p95_ms': round(_percentile(durations, 0.95), 1),
+            'db_p50_ms': round(_percentile(db_times, 0.50), 1),
+            'db_p95_ms': round(_percentile(db_times, 0.95), 1),
+            'queries_p50': _percentile(counts, 0.50),
+            'queries_max': max(counts),
+        }
+    return summary
+
+
+def init_instrumentation(app):
+    """Installe les hooks SQLAlchemy et le suivi des requêtes HTTP."""
+    app.config.setdefault('SERVER_TIMING', True)
+    app.config.setdefault('ROUTE_STATS_WINDOW', 1000)
+    app.config.setdefault('SLOW_QUERY_THRESHOLD_MS', 200)
+    app.config.setdefault('SLOW_QUERY_SAMPLE_RATE', 1.0)
+
+    for name, listener in (('before_cursor_execute', _before_cursor_execute),
+                           ('after_cursor_execute', _after_cursor_execute),
+                           ('handle_error', _handle_error)):
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,53 @@
+from sqlalchemy import select, update
+from models import db, Event, TicketType
+
+
+def reserve_stock(ticket_type_id, quantity):
+    """Décrémente atomiquement le stock d'un type de ticket.
+
+    Un seul UPDATE conditionnel : la ligne n'est modifiée que s'il reste
+    assez de places. Retourne True si le stock a été décrémenté.
+    """
+    if quantity <= 0:
+        return False
+
+    result = db.session.execute(
+        update(TicketType)
+        .where(TicketType.id == ticket_type_id,
+               TicketType.available_quantity >= quantity)
+        .values(available_quantity=TicketType.available_quantity - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    _adjust_event_available(ticket_type_id, -quantity)
+    return True
+
+
+def release_stock(ticket_type_id, quantity):
+    """Remet atomiquement des places en stock (sans dépasser le total)."""
+    if quantity <= 0:
+        return False
+
+    result = db.session.execute(
+        update(TicketType)
+        .where(TicketType.id == ticket_type_id,
+               TicketType.available_quantity + quantity <= TicketType.total_quantity)
+        .values(available_quantity=TicketType.available_quantity + quantity)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    _adjust_event_available(ticket_type_id, quantity)
+    return True
+
+
+def _adjust_event_available(ticket_type_id, delta):
+    """Répercute une variation de stock sur le compteur `Event.available_total`."""
+    event_id = select(TicketType.event_id).where(TicketType.id == ticket_type_id).scalar_subquery()
+    db.session.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(available_total=Event.available_total + delta)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,137 @@
+"""File de tâches de fond stockée en base, consommée par `flask worker`.
+
+Chaque type de tâche est décrit par trois étapes :
+- `prepare(payload)` lit la base dans le processus principal et retourne
+  des données simples ;
+- `compute(data)` fait le travail coûteux dans le pool de processus
+  (fonction de module, sans accès à la base) ;
+- `store(payload, result)` enregistre le résultat dans le processus principal.
+"""
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from models import db, Job
+
+JobSpec = namedtuple('JobSpec', ['prepare', 'compute', 'store'])
+
+JOB_HANDLERS = {}
+
+BACKOFF_BASE = timedelta(seconds=10)
+BACKOFF_MAX = timedelta(hours=1)
+
+
+def register_job(kind, prepare, compute, store):
+    """Déclare un type de tâche."""
+    JOB_HANDLERS[kind] = JobSpec(prepare, compute, store)
+
+
+def enqueue(kind, payload, key=None, user_id=None, max_attempts=5, run_at=None):
+    """Ajoute une tâche à la file (le commit est laissé à l'appelant).
+
+    Si une tâche active porte déjà la même clé, elle est retournée à la
+    place d'un doublon.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Type de tâche inconnu : {kind}")
+
+    if key is not None:
+        existing = Job.query.filter(Job.key == key, Job.status.in_(('en_attente', 'en_cours'))).first()
+        if existing:
+            return existing
+
+    job = Job(
+        kind=kind,
+        key=key,
+        payload=json.dumps(payload),
+        user_id=user_id,
+        max_attempts=max_attempts,
+        run_at=run_at or datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+
+def claim_jobs(limit):
+    """Réserve jusqu'à `limit` tâches prêtes et les passe à l'état 'en_cours'.
+
+    Sous PostgreSQL, `SKIP LOCKED` permet de lancer plusieurs workers.
+    """
+    now = datetime.utcnow()
+    jobs = db.session.scalars(
+        select(Job)
+        .where(Job.status == 'en_attente', Job.run_at <= now)
+        .order_by(Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    for job in jobs:
+        job.status = 'en_cours'
+        job.locked_at = now
+        job.attempts += 1
+    db.session.commit()
+    return jobs
+
+
+def complete_job(job):
+    """Marque une tâche comme terminée."""
+    job.status = 'terminé'
+    job.finished_at = datetime.utcnow()
+    job.last_error = None
+    db.session.commit()
+
+
+def fail_job(job, error):
+    """Enregistre un échec et reprogramme la tâche avec un délai exponentiel."""
+    job.last_error = error
+    if job.attempts >= job.max_attempts:
+        job.status = 'échec'
+        job.finished_at = datetime.utcnow()
+    else:
+        job.status = 'en_attente'
+        job.run_at = datetime.utcnow() + min(BACKOFF_BASE * 2 ** (job.attempts - 1), BACKOFF_MAX)
+    job.locked_at = None
+    db.session.commit()
+
+
+def requeue_stale_jobs(timeout=timedelta(minutes=10)):
+    """Remet en file les tâches 'en_cours' abandonnées par un worker arrêté."""
+    result = db.session.execute(
+        update(Job)
+        .where(Job.status == 'en_cours', Job.locked_at < datetime.utcnow() - timeout)
+        .values(status='en_attente', locked_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def run_jobs(pool, batch_size):
+    """Exécute un lot de tâches dans le pool de processus.
+
+    Retourne le nombre de tâches traitées (0 si la file est vide).
+    """
+    jobs = claim_jobs(batch_size)
+    futures = []
+    for job in jobs:
+        spec = JOB_HANDLERS.get(job.kind)
+        if spec is None:
+            fail_job(job, f"Type de tâche inconnu : {job.kind}")
+            continue
+        try:
+            data = spec.prepare(json.loads(job.payload))
+        except Exception as e:
+            db.session.rollback()
+            fail_job(job, str(e))
+            continue
+        futures.append((job, spec, pool.submit(spec.compute, data)))
+
+    for job, spec, future in futures:
+        try:
+            spec.store(json.loads(job.payload), future.result())
+            complete_job(job)
+        except Exception as e:
+            db.session.rollback()
+            fail_job(job, str(e))
+    return len(jobs)
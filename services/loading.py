@@ -0,0 +1,42 @@
+"""Profils de chargement des relations pour les pages de liste.
+
+Chaque profil regroupe les options (joinedload, selectinload, raiseload)
+adaptées à ce que le template affiche, afin d'éviter une requête par
+ligne (N+1). `raiseload` transforme tout accès non prévu à une relation
+en erreur plutôt qu'en requête silencieuse.
+"""
+from sqlalchemy.orm import joinedload, load_only, raiseload, selectinload
+from models import Event, Ticket, User
+
+# Les options sont construites à l'usage : les relations déclarées par
+# `backref` n'existent qu'une fois les mappers configurés.
+LOADER_PROFILES = {
+    # Cartes d'événements : les compteurs stockés suffisent, aucune relation
+    'event_cards': lambda: (raiseload('*'),),
+    # Historique d'achats : événement et type de chaque ticket en une jointure
+    'purchase_history': lambda: (
+        joinedload(Ticket.event, innerjoin=True),
+        joinedload(Ticket.ticket_type, innerjoin=True),
+        raiseload('*'),
+    ),
+    # Détail d'un événement : types de tickets en une requête
+    'event_detail': lambda: (selectinload(Event.ticket_types),),
+    # Liste des utilisateurs : colonnes affichées uniquement
+    'admin_users': lambda: (
+        load_only(User.id, User.username, User.first_name, User.last_name, User.email,
+                  User.role, User.organizer_request_status),
+        raiseload('*'),
+    ),
+    # Demandes d'organisateur : champs de la demande, sans le reste du profil
+    'organizer_requests': lambda: (
+        load_only(User.id, User.username, User.first_name, User.last_name,
+                  User.organizer_request_status, User.organizer_request_date, User.organizer_request_message,
+                  User.organizer_request_phone, User.organizer_request_identity_type),
+        raiseload('*'),
+    ),
+}
+
+
+def with_profile(query, name):
+    """Applique le profil de chargement `name` à une requête."""
+    return query.options(*LOADER_PROFILES[name]())
@@ -0,0 +1,156 @@
+"""Journalisation structurée et non bloquante.
+
+Les enregistrements sont filtrés (niveau, échantillonnage des messages
+DEBUG) et enrichis de l'identifiant de requête dans le thread appelant,
+puis déposés dans une file mémoire ; un `QueueListener` en arrière-plan
+les formate (JSON en production, texte en développement) et les écrit.
+Si la file est pleine, l'enregistrement est abandonné plutôt que de
+bloquer la requête.
+
+Variables d'environnement : LOG_LEVEL, LOG_FORMAT ('json' ou 'text'),
+LOG_DEBUG_SAMPLE_RATE, LOG_QUEUE_SIZE.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Attributs standard d'un LogRecord ; les autres viennent de `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+# Niveaux des bibliothèques bavardes, quel que soit l'environnement
+LIBRARY_LEVELS = {
+    'sqlalchemy.engine': logging.WARNING,
+    'werkzeug': logging.INFO,
+    'stripe': logging.WARNING,
+}
+
+
+class RequestContextFilter(logging.Filter):
+    """Ajoute l'identifiant et la route de la requête HTTP en cours."""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.method = request.method
+            record.path = request.path
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Ne conserve qu'une fraction des messages DEBUG."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler qui abandonne les enregistrements lorsque la file est pleine."""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Résoudre message et exception ici : l'enregistrement doit être sérialisable
+        record = logging.makeLogRecord(vars(record))
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Formate un enregistrement en une ligne JSON."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Format lisible pour le développement, avec l'identifiant de requête."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s [%(name)s] %(request_label)s%(message)s')
+
+    def format(self, record):
+        request_id = getattr(record, 'request_id', None)
+        record.request_label = f'{request_id} ' if request_id else ''
+        return super().format(record)
+
+
+def _assign_request_id():
+    incoming = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+
+
+def _expose_request_id(response):
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+
+def configure_logging(app):
+    """Configure la journalisation de l'application selon l'environnement."""
+    development = app.debug
+    level = os.getenv('LOG_LEVEL', 'DEBUG' if development else 'INFO').upper()
+    log_format = os.getenv('LOG_FORMAT', 'text' if development else 'json')
+    sample_rate = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '1.0'))
+    queue_size = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if log_format == 'json' else TextFormatter())
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    handler.addFilter(DebugSamplingFilter(sample_rate))
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(logging.NOTSET)
+    for name, library_level in LIBRARY_LEVELS.items():
+        logging.getLogger(name).setLevel(max(library_level, logging.getLevelName(level)))
+
+    listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    app.before_request(_assign_request_id)
+    app.after_request(_expose_request_id)
+    return listener
@@ -0,0 +1,221 @@
+"""Cache des pages publiques pour les visiteurs anonymes.
+
+Les réponses de `@cached_page` sont stockées par chemin + paramètres de
+requête normalisés, avec un ETag permettant les réponses 304. Chaque page
+porte des étiquettes ('event_list', 'event:42') ; chaque étiquette a un
+numéro de version dans le backend. Une entrée n'est valide que si les
+versions enregistrées au début de son rendu sont toujours les versions
+courantes.
+
+Les écritures appellent `mark_stale(*tags)` dans leur transaction : les
+versions ne sont incrémentées qu'après le commit, afin qu'aucun rendu
+concurrent ne remette en cache des données non encore validées.
+
+Backends :
+- 'memory' (défaut) : LRU borné propre au processus ; les autres
+  processus ne voient pas les invalidations avant `PAGE_CACHE_TTL`.
+- 'redis' : partagé entre processus (`PAGE_CACHE_REDIS_URL`, dépendance
+  `redis` optionnelle).
+- 'none' : cache désactivé.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, has_app_context, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+
+EVENT_LIST_TAG = 'event_list'
+
+
+def event_tag(event_id):
+    """Étiquette des pages qui affichent un événement donné."""
+    return f'event:{event_id}'
+
+
+class MemoryBackend:
+    """LRU en mémoire, borné en nombre d'entrées."""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def tag_versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+class RedisBackend:
+    """Backend partagé entre processus, stocké dans Redis."""
+
+    def __init__(self, url, prefix='page_cache:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("PAGE_CACHE_BACKEND=redis nécessite le paquet 'redis'") from e
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key, entry, ttl):
+        self.client.set(self.prefix + key, json.dumps(entry), ex=int(ttl))
+
+    def tag_versions(self, tags):
+        if not tags:
+            return []
+        return [int(v or 0) for v in self.client.mget([f'{self.prefix}tag:{tag}' for tag in tags])]
+
+    def bump(self, tags):
+        pipeline = self.client.pipeline()
+        for tag in tags:
+            pipeline.incr(f'{self.prefix}tag:{tag}')
+        pipeline.execute()
+
+
+def _create_backend(config):
+    name = config['PAGE_CACHE_BACKEND']
+    if name == 'memory':
+        return MemoryBackend(config['PAGE_CACHE_MAX_ENTRIES'])
+    if name == 'redis':
+        return RedisBackend(config['PAGE_CACHE_REDIS_URL'])
+    if name == 'none':
+        return None
+    raise RuntimeError(f"Backend de cache de pages inconnu : {name}")
+
+
+def _backend():
+    return current_app.extensions.get('page_cache')
+
+
+def cache_key():
+    """Clé de cache : chemin + paramètres non vides, triés."""
+    args = sorted((k, v) for k, v in request.args.items(multi=True) if v != '')
+    return f'{request.path}?{urlencode(args)}'
+
+
+def _cacheable():
+    return (request.method in ('GET', 'HEAD')
+            and _backend() is not None
+            and not current_user.is_authenticated
+            and '_flashes' not in session)
+
+
+def _finalize(response, status):
+    response.headers['X-Cache'] = status
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+
+def cached_page(tags):
+    """Décorateur : met en cache la page pour les visiteurs anonymes.
+
+    `tags` reçoit les arguments de la route et retourne les étiquettes de la page.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not _cacheable():
+                return f(*args, **kwargs)
+
+            backend = _backend()
+            key = cache_key()
+            page_tags = tags(**kwargs)
+            entry = backend.get(key)
+            if entry is not None and backend.tag_versions(page_tags) == entry['versions']:
+                response = current_app.response_class(entry['body'], status=entry['status'],
+                                                      mimetype=entry['mimetype'], headers=entry['headers'])
+                response.set_etag(entry['etag'])
+                return _finalize(response, 'HIT')
+
+            # Versions lues avant le rendu : une invalidation concurrente rendra l'entrée caduque
+            versions = backend.tag_versions(page_tags)
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough or '_flashes' in session:
+                return response
+
+            body = response.get_data(as_text=True)
+            etag = hashlib.sha1(body.encode()).hexdigest()
+            response.set_etag(etag)
+            backend.set(key, {
+                'body': body,
+                'status': response.status_code,
+                'mimetype': response.mimetype,
+                'headers': {name: value for name, value in response.headers.items() if name.startswith('X-')},
+                'etag': etag,
+                'versions': versions,
+            }, current_app.config['PAGE_CACHE_TTL'])
+            return _finalize(response, 'MISS')
+        return decorated_function
+    return decorator
+
+
+def mark_stale(*tags):
+    """Invalide les étiquettes données après le commit de la transaction courante."""
+    db.session.info.setdefault('page_cache_tags', set()).update(tags)
+
+
+def invalidate(*tags):
+    """Invalide immédiatement les étiquettes données."""
+    if not has_app_context():
+        return
+    backend = _backend()
+    if backend is not None and tags:
+        backend.bump(sorted(tags))
+
+
+def _after_commit(db_session):
+    tags = db_session.info.pop('page_cache_tags', None)
+    if tags:
+        invalidate(*tags)
+
+
+def _after_rollback(db_session):
+    db_session.info.pop('page_cache_tags', None)
+
+
+def init_page_cache(app, backend=None):
+    """Installe le cache de pages ; `backend` remplace celui de la configuration."""
+    app.config.setdefault('PAGE_CACHE_BACKEND', 'memory')
+    app.config.setdefault('PAGE_CACHE_TTL', 300)
+    app.config.setdefault('PAGE_CACHE_MAX_ENTRIES', 1000)
+    app.extensions['page_cache'] = backend if backend is not None else _create_backend(app.config)
+
+    if not event.contains(Session, 'after_commit', _after_commit):
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
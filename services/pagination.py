@@ -0,0 +1,57 @@
+"""Pagination par clé (keyset) avec curseurs opaques.
+
+Au lieu d'un OFFSET, chaque page reprend après les valeurs de tri du
+dernier élément de la page précédente : le coût d'une page reste
+constant quelle que soit la taille de la table.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+
+
+def encode_cursor(sort_name, values):
+    """Encode les valeurs de tri du dernier élément en curseur d'URL."""
+    encoded = [{'dt': v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps({'s': sort_name, 'v': encoded}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort_name):
+    """Décode un curseur ; retourne None s'il est invalide ou issu d'un autre tri."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if data.get('s') != sort_name:
+            return None
+        return [datetime.fromisoformat(v['dt']) if isinstance(v, dict) else v for v in data['v']]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+
+
+def keyset_page(query, sort_name, columns, descending, cursor=None, per_page=12):
+    """Retourne (éléments, curseur suivant) pour une requête triée par `columns`.
+
+    `columns` doit se terminer par une colonne unique (l'identifiant) afin
+    que l'ordre soit total. Les colonnes sont ajoutées au SELECT pour
+    pouvoir construire le curseur suivant. `per_page` doit valoir au moins 1.
+    """
+    if per_page < 1:
+        raise ValueError(f"per_page doit être supérieur ou égal à 1 : {per_page}")
+    labelled = [column.label(f'_keyset_{i}') for i, column in enumerate(columns)]
+    values = decode_cursor(cursor, sort_name)
+    if values is not None and len(values) == len(columns):
+        position = tuple_(*columns)
+        query = query.filter(position < tuple_(*values) if descending else position > tuple_(*values))
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.add_columns(*labelled).order_by(*ordering).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(sort_name, list(rows[-1][1:]))
+    return [row[0] for row in rows], next_cursor
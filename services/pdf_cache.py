@@ -0,0 +1,132 @@
+"""Cache disque des PDF de tickets, versionné et borné (éviction LRU).
+
+La version d'un PDF est une empreinte des informations affichées : toute
+modification du titre, de la date ou du lieu de l'événement produit une
+nouvelle version, et l'ancien fichier est alors remplacé au prochain rendu.
+
+La taille du cache est suivie en mémoire au fil des écritures : le dossier
+n'est parcouru que lorsque l'estimation dépasse la limite, ou au plus tard
+toutes les `RESCAN_INTERVAL` secondes pour tenir compte des autres workers.
+"""
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from flask import current_app
+from services.rendering import render_ticket_pdf
+
+RESCAN_INTERVAL = 300
+
+_usage = {}  # dossier -> [taille estimée en octets, instant du dernier parcours]
+_usage_lock = threading.Lock()
+
+
+def pdf_version(info):
+    """Retourne l'empreinte (version) des informations d'un ticket."""
+    encoded = json.dumps(info, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def render_versioned_pdf(info):
+    """Rend le PDF d'un ticket et retourne le couple (version, PDF)."""
+    return pdf_version(info), render_ticket_pdf(info)
+
+
+def cached_pdf_path(ticket_id, version):
+    """Retourne le chemin du PDF d'un ticket pour une version donnée."""
+    return os.path.join(current_app.config['TICKET_PDF_FOLDER'], f"ticket_{ticket_id}_{version}.pdf")
+
+
+def get_cached_pdf(ticket_id, version):
+    """Retourne le chemin du PDF en cache, ou None s'il est absent.
+
+    Un accès met à jour la date de modification, qui sert d'horodatage LRU.
+    """
+    path = cached_pdf_path(ticket_id, version)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def store_pdf(ticket_id, version, pdf):
+    """Enregistre un PDF, supprime ses anciennes versions puis applique la limite de taille."""
+    path = cached_pdf_path(ticket_id, version)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    delta = len(pdf) - _size(path)
+    # Écriture atomique : un téléchargement concurrent ne voit jamais un fichier partiel
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(pdf)
+    os.replace(tmp_path, path)
+
+    for old_path in glob.glob(cached_pdf_path(ticket_id, '*')):
+        if old_path != path:
+            delta -= _size(old_path)
+            _remove(old_path)
+
+    max_bytes = current_app.config['TICKET_PDF_CACHE_MAX_BYTES']
+    if _track_usage(delta) > max_bytes:
+        evict_pdfs(max_bytes)
+    return path
+
+
+def _track_usage(delta):
+    """Ajoute `delta` à la taille estimée du cache et la retourne.
+
+    Retourne l'infini lorsque l'estimation est absente ou trop ancienne,
+    afin de déclencher un parcours complet.
+    """
+    folder = current_app.config['TICKET_PDF_FOLDER']
+    with _usage_lock:
+        usage = _usage.get(folder)
+        if usage is None or time.monotonic() - usage[1] > RESCAN_INTERVAL:
+            return float('inf')
+        usage[0] += delta
+        return usage[0]
+
+
+def evict_pdfs(max_bytes):
+    """Supprime les PDF les moins récemment utilisés jusqu'à passer sous `max_bytes`.
+
+    Parcourt tout le dossier et met à jour la taille estimée du cache.
+    """
+    folder = current_app.config['TICKET_PDF_FOLDER']
+    entries = []
+    total = 0
+    for path in glob.glob(os.path.join(folder, 'ticket_*.pdf')):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    evicted = 0
+    for mtime, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        _remove(path)
+        total -= size
+        evicted += 1
+
+    with _usage_lock:
+        _usage[folder] = [total, time.monotonic()]
+    return evicted
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
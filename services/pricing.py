@@ -0,0 +1,29 @@
+"""Fourchette de prix dénormalisée sur `event` (min_price, max_price).
+
+Les colonnes sont recalculées à partir de `ticket_type` à chaque création
+ou modification des types de tickets, ce qui permet de trier la liste des
+événements par prix à l'aide d'un index.
+"""
+from sqlalchemy import func, select, update
+from models import db, Event, TicketType
+
+
+def _price_range_update():
+    prices = select(TicketType.price).where(TicketType.event_id == Event.id)
+    return update(Event).values(
+        min_price=func.coalesce(prices.with_only_columns(func.min(TicketType.price)).scalar_subquery(), 0),
+        max_price=func.coalesce(prices.with_only_columns(func.max(TicketType.price)).scalar_subquery(), 0),
+    ).execution_options(synchronize_session=False)
+
+
+def refresh_price_range(event_id):
+    """Recalcule la fourchette de prix d'un événement (types de tickets déjà envoyés en base)."""
+    db.session.flush()
+    db.session.execute(_price_range_update().where(Event.id == event_id))
+
+
+def backfill_price_ranges():
+    """Recalcule la fourchette de prix de tous les événements ; retourne le nombre de lignes."""
+    result = db.session.execute(_price_range_update())
+    db.session.commit()
+    return result.rowcount
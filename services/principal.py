@@ -0,0 +1,92 @@
+"""Utilisateur connecté mis en cache pour Flask-Login.
+
+`load_principal` remplace le chargement de la ligne `users` complète à
+chaque requête authentifiée : `current_user` est un `UserPrincipal`, qui
+ne porte que l'identifiant, le nom, le rôle et le statut de la demande
+d'organisateur. Il est conservé en mémoire `USER_PRINCIPAL_TTL` secondes,
+si bien que les vérifications de rôle (`admin_required`,
+`organizer_required`, menus de `base.html`) ne touchent pas la base.
+
+Les écritures qui modifient ces champs appellent `invalidate_principal`
+après leur commit (changement de rôle, revue d'une demande, déconnexion).
+Le cache est propre au processus : dans les autres workers, la durée de
+vie borne le délai de prise en compte d'un changement de rôle.
+
+Les routes qui ont besoin du profil complet le chargent avec
+`current_user.load()`.
+"""
+import threading
+import time
+from flask import current_app
+from models import db, User
+
+MAX_ENTRIES = 10000
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class UserPrincipal:
+    """Identité et rôle de l'utilisateur connecté, sans le reste du profil."""
+    __slots__ = ('id', 'username', 'role', 'organizer_request_status')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, id, username, role, organizer_request_status):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.organizer_request_status = organizer_request_status
+
+    def __repr__(self):
+        return f'<UserPrincipal {self.username} ({self.role})>'
+
+    def get_id(self):
+        return str(self.id)
+
+    # Mêmes règles que le modèle : elles ne lisent que `role` et `organizer_request_status`
+    is_super_admin = User.is_super_admin
+    is_admin = User.is_admin
+    is_organizer = User.is_organizer
+    is_user = User.is_user
+    has_pending_organizer_request = User.has_pending_organizer_request
+
+    def load(self):
+        """Charge la ligne `users` complète de l'utilisateur."""
+        return db.session.get(User, self.id)
+
+
+def load_principal(user_id):
+    """Retourne le `UserPrincipal` de `user_id` depuis le cache ou la base ; None s'il n'existe pas."""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(user_id)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    row = db.session.execute(
+        db.select(User.id, User.username, User.role, User.organizer_request_status).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    principal = UserPrincipal(*row)
+    with _cache_lock:
+        if len(_cache) >= MAX_ENTRIES:
+            for expired in [key for key, (expires_at, _) in _cache.items() if expires_at <= now]:
+                del _cache[expired]
+        _cache[user_id] = (now + current_app.config.get('USER_PRINCIPAL_TTL', 60), principal)
+    return principal
+
+
+def invalidate_principal(*user_ids):
+    """Retire du cache les utilisateurs donnés (à appeler après le commit)."""
+    with _cache_lock:
+        for user_id in user_ids:
+            _cache.pop(int(user_id), None)
@@ -0,0 +1,47 @@
+"""Budget de requêtes SQL par route.
+
+Les routes déclarent leur budget avec `@query_budget(n)`. Le nombre de
+requêtes exécutées pendant la requête HTTP est compté par
+services.instrumentation ; selon `QUERY_BUDGET_MODE` :
+
+- 'off' (défaut) : aucun contrôle ;
+- 'warn' : un dépassement est journalisé ;
+- 'raise' : un dépassement lève `QueryBudgetExceeded` (mode test).
+"""
+from functools import wraps
+from flask import current_app, g, request
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Une route a exécuté plus de requêtes SQL que son budget."""
+
+
+def query_budget(max_queries):
+    """Décorateur : déclare le nombre maximal de requêtes SQL d'une route."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            return f(*args, **kwargs)
+        decorated_function.query_budget = max_queries
+        return decorated_function
+    return decorator
+
+
+def _check_budget(response):
+    mode = current_app.config.get('QUERY_BUDGET_MODE', 'off')
+    if mode == 'off':
+        return response
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', None)
+    count = g.get('query_count', 0)
+    if budget is not None and count > budget:
+        message = f"{request.endpoint} : {count} requêtes SQL pour un budget de {budget}"
+        if mode == 'raise':
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+    return response
+
+
+def init_query_budget(app):
+    """Installe le contrôle des budgets (nécessite services.instrumentation)."""
+    app.after_request(_check_budget)
@@ -0,0 +1,130 @@
+"""Rapport EXPLAIN des requêtes des routes principales.
+
+`flask explain-queries` exécute EXPLAIN sur chaque requête déclarée dans
+`route_queries()` et signale les parcours complets de table, afin de
+rendre visibles les régressions d'index.
+"""
+import random
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select, text
+from models import db, Event, EventFacet, Ticket, TicketType, User
+from services.user_admin import prefix_match
+
+
+def route_queries():
+    """Retourne les requêtes représentatives de chaque route : [(nom, select)]."""
+    now = datetime.now()
+    organizer_id = db.session.scalar(select(Event.organizer_id).limit(1)) or 1
+    user_id = db.session.scalar(select(Ticket.user_id).limit(1)) or 1
+    event_id = db.session.scalar(select(Event.id).limit(1)) or 1
+
+    return [
+        ('index', select(Event).order_by(Event.date.desc()).limit(20)),
+        ('index (type)', select(Event).where(Event.event_type == 'Concert').order_by(Event.date.desc()).limit(20)),
+        ('index (lieu)', select(Event).where(Event.location == 'Dakar').order_by(Event.date.desc()).limit(20)),
+        ('index (à venir)', select(Event).where(Event.date > now).order_by(Event.date.desc()).limit(20)),
+        ('index (prix croissant)', select(Event).order_by(Event.min_price, Event.id).limit(20)),
+        ('index (prix décroissant)', select(Event).order_by(Event.max_price.desc(), Event.id.desc()).limit(20)),
+        ('index (facettes)', select(EventFacet.facet, EventFacet.value, func.sum(EventFacet.event_count))
+            .group_by(EventFacet.facet, EventFacet.value)),
+        ('my_events', select(Event).where(Event.organizer_id == organizer_id).order_by(Event.date.desc())),
+        ('event_detail', select(TicketType).where(TicketType.event_id == event_id)),
+        ('delete_event (tickets vendus)', select(Ticket.id).where(Ticket.event_id == event_id).limit(1)),
+        ('purchase_history', select(Ticket).where(Ticket.user_id == user_id).order_by(Ticket.purchase_date.desc())),
+        ('dashboard', select(Event.id, func.sum(TicketType.total_quantity))
+            .outerjoin(TicketType, TicketType.event_id == Event.id)
+            .where(Event.organizer_id == organizer_id).group_by(Event.id)),
+        ('admin_organizer_requests', select(User).where(User.organizer_request_status == 'pending')
+            .order_by(User.organizer_request_date, User.id).limit(25)),
+        ('admin_users (rôle)', select(User).where(User.role == 'organizer').order_by(User.id).limit(25)),
+        ('admin_users (recherche)', select(User).where(prefix_match(func.lower(User.username), 'seed'))
+            .order_by(User.id).limit(25)),
+    ]
+
+
+def explain(statement):
+    """Retourne le plan d'exécution d'une requête sous forme de lignes de texte."""
+    connection = db.session.connection()
+    dialect = connection.dialect
+    compiled = statement.compile(dialect=dialect)
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    if dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", params).fetchall()
+    return [row[0] for row in rows]
+
+
+def has_full_scan(plan):
+    """Détecte un parcours complet de table dans un plan d'exécution."""
+    for line in plan:
+        if 'Seq Scan' in line:
+            return True
+        # SQLite : "SCAN event" sans index (les "SCAN ... USING INDEX" sont acceptables)
+        if line.startswith('SCAN ') and 'USING' not in line:
+            return True
+    return False
+
+
+def is_test_database():
+    """Vérifie si la base courante peut recevoir des données synthétiques (SQLite ou TESTING)."""
+    return db.engine.dialect.name == 'sqlite' or bool(current_app.config.get('TESTING'))
+
+
+def seed_dataset(events=1000, tickets_per_event=20, force=False):
+    """Insère un jeu de données synthétique pour rendre les plans représentatifs.
+
+    Refuse d'écrire dans une base qui n'est pas une base de test, sauf `force`.
+    """
+    if not (force or is_test_database()):
+        raise RuntimeError(f"Refus d'insérer des données synthétiques dans {db.engine.url.render_as_string()} : "
+                           "ce n'est pas une base de test")
+    rng = random.Random(42)
+    suffix = datetime.now().strftime('%Y%m%d%H%M%S')
+    organizers = []
+    for i in range(10):
+        organizer = User(f"seed_org_{suffix}_{i}", f"seed_org_{suffix}_{i}@example.com", 'seed')
+        organizer.role = 'organizer'
+        organizers.append(organizer)
+    buyers = [User(f"seed_user_{suffix}_{i}", f"seed_user_{suffix}_{i}@example.com", 'seed') for i in range(100)]
+    for buyer in buyers[:5]:
+        buyer.organizer_request_status = 'pending'
+        buyer.organizer_request_date = datetime.utcnow()
+    for buyer in buyers[5:20]:
+        buyer.organizer_request_status = rng.choice(['approved', 'rejected'])
+        buyer.organizer_request_date = datetime.utcnow()
+    db.session.add_all(organizers + buyers)
+    db.session.flush()
+
+    types = ['Concert', 'Théâtre', 'Sport', 'Conférence', 'Festival']
+    locations = ['Dakar', 'Thiès', 'Saint-Louis', 'Ziguinchor', 'Kaolack']
+    for i in range(events):
+        event = Event(
+            title=f"Événement {i}",
+            description=f"Description de l'événement {i}",
+            event_type=rng.choice(types),
+            date=datetime.now() + timedelta(days=rng.randint(-365, 365)),
+            location=rng.choice(locations),
+            organizer_id=rng.choice(organizers).id
+        )
+        db.session.add(event)
+        db.session.flush()
+        ticket_type = TicketType(event_id=event.id, name='Standard', price=rng.randint(1, 100) * 500,
+                                 total_quantity=tickets_per_event * 2, available_quantity=tickets_per_event)
+        db.session.add(ticket_type)
+        db.session.flush()
+        db.session.add_all([
+            Ticket(event_id=event.id, user_id=rng.choice(buyers).id, ticket_type_id=ticket_type.id,
+                   quantity=1, total_price=ticket_type.price, payment_status='payé',
+                   purchase_date=datetime.now() - timedelta(days=rng.randint(0, 365)))
+            for _ in range(tickets_per_event)
+        ])
+        if i % 100 == 0:
+            db.session.commit()
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
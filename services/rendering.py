@@ -0,0 +1,102 @@
+"""Rendus coûteux en CPU (QR codes, PDF des tickets).
+
+Ces fonctions ne prennent et ne retournent que des données simples afin
+de pouvoir être exécutées dans un pool de processus par le worker.
+"""
+from functools import lru_cache
+from io import BytesIO
+import qrcode
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfgen import canvas
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Frame
+
+
+def render_qr_png(data):
+    """Retourne l'image PNG (bytes) d'un QR code contenant `data`."""
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+@lru_cache(maxsize=None)
+def ticket_styles():
+    """Retourne les styles du ticket, construits une seule fois par processus."""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30
+    )
+    info_style = ParagraphStyle(
+        'CustomInfo',
+        parent=styles['Normal'],
+        fontSize=12,
+        spaceAfter=12
+    )
+    return title_style, info_style
+
+
+def ticket_flowables(info):
+    """Retourne les éléments ReportLab d'une page de ticket."""
+    title_style, info_style = ticket_styles()
+
+    # Titre
+    elements = [Paragraph(f"Ticket - {info['event_title']}", title_style)]
+
+    # Créer une image ReportLab à partir du QR code
+    qr_img = Image(BytesIO(render_qr_png(info['qr_data'])))
+    qr_img.drawHeight = 200
+    qr_img.drawWidth = 200
+
+    ticket_info = [
+        f"<b>Événement:</b> {info['event_title']}",
+        f"<b>Date:</b> {info['event_date']}",
+        f"<b>Lieu:</b> {info['event_location']}",
+        f"<b>Type de ticket:</b> {info['ticket_type']}",
+        f"<b>Quantité:</b> {info['quantity']}",
+        f"<b>Prix total:</b> {info['total_price']} FCFA",
+        f"<b>Date d'achat:</b> {info['purchase_date']}",
+        f"<b>Statut du paiement:</b> {info['payment_status']}"
+    ]
+    for line in ticket_info:
+        elements.append(Paragraph(line, info_style))
+
+    # Ajouter un espace avant le QR code
+    elements.append(Spacer(1, 20))
+    elements.append(qr_img)
+    return elements
+
+
+def render_ticket_pdf(info):
+    """Retourne le PDF (bytes) d'un ticket à partir d'un dictionnaire d'informations."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    doc.build(ticket_flowables(info))
+    return buffer.getvalue()
+
+
+def render_tickets_pdf(infos, output):
+    """Écrit dans `output` un PDF d'au moins une page par ticket.
+
+    Les tickets sont consommés un à un depuis l'itérable `infos` ; ce qui
+    ne tient pas sur la page d'un ticket continue sur la page suivante.
+    ReportLab conserve toutes les pages en mémoire jusqu'à `save()`.
+    """
+    pdf = canvas.Canvas(output, pagesize=A4)
+    width, height = A4
+    margin = 72
+    for info in infos:
+        # `addFromList` retire de la liste les éléments dessinés et laisse ceux qui ne tiennent pas
+        flowables = ticket_flowables(info)
+        while flowables:
+            frame = Frame(margin, margin, width - 2 * margin, height - 2 * margin)
+            frame.addFromList(flowables, pdf)
+            pdf.showPage()
+    pdf.save()
@@ -0,0 +1,144 @@
+"""Compteurs de ventes dénormalisés sur `event` et `ticket_type`.
+
+- `tickets_sold` / `revenue` : incrémentés dans la transaction de chaque
+  achat par `record_sale`.
+- `Event.available_total` : somme des `available_quantity`, ajustée par
+  `services.inventory` à chaque mouvement de stock et recalculée lorsque
+  les types de tickets d'un événement sont réécrits.
+
+`reconcile_counters` recalcule tous les compteurs en quelques requêtes
+groupées et signale les écarts.
+
+Chaque vente alimente aussi l'agrégat journalier `sales_daily`
+(événement × type de ticket × jour), source des courbes et exports du
+tableau de bord ; `rebuild_sales_daily` le reconstruit à partir des tickets.
+"""
+from datetime import datetime
+from sqlalchemy import delete, func, select, update
+from models import db, Event, SalesDaily, Ticket, TicketType
+from services.page_cache import EVENT_LIST_TAG, event_tag, mark_stale
+from services.sql import upsert
+
+EVENT_COUNTERS = ('tickets_sold', 'revenue', 'available_total')
+TICKET_TYPE_COUNTERS = ('tickets_sold', 'revenue')
+
+
+def record_sale(ticket):
+    """Ajoute un ticket vendu aux compteurs de son type et de son événement."""
+    for model, row_id in ((TicketType, ticket.ticket_type_id), (Event, ticket.event_id)):
+        db.session.execute(
+            update(model)
+            .where(model.id == row_id)
+            .values(tickets_sold=model.tickets_sold + ticket.quantity,
+                    revenue=model.revenue + ticket.total_price)
+            .execution_options(synchronize_session=False)
+        )
+    _add_daily_sale(ticket)
+    mark_stale(EVENT_LIST_TAG, event_tag(ticket.event_id))
+
+
+def _add_daily_sale(ticket):
+    statement = upsert(SalesDaily).values(
+        event_id=ticket.event_id,
+        ticket_type_id=ticket.ticket_type_id,
+        day=(ticket.purchase_date or datetime.now()).date(),
+        tickets_sold=ticket.quantity,
+        revenue=ticket.total_price
+    )
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['event_id', 'ticket_type_id', 'day'],
+        set_={'tickets_sold': SalesDaily.tickets_sold + statement.excluded.tickets_sold,
+              'revenue': SalesDaily.revenue + statement.excluded.revenue}
+    ))
+
+
+def rebuild_sales_daily():
+    """Reconstruit l'agrégat journalier à partir des tickets ; retourne le nombre de lignes."""
+    db.session.execute(delete(SalesDaily))
+    day = func.date(Ticket.purchase_date)
+    db.session.execute(
+        SalesDaily.__table__.insert().from_select(
+            ['event_id', 'ticket_type_id', 'day', 'tickets_sold', 'revenue'],
+            select(Ticket.event_id, Ticket.ticket_type_id, day, func.sum(Ticket.quantity), func.sum(Ticket.total_price))
+            .group_by(Ticket.event_id, Ticket.ticket_type_id, day)
+        )
+    )
+    db.session.commit()
+    return db.session.scalar(select(func.count()).select_from(SalesDaily))
+
+
+def refresh_available_total(event_id):
+    """Recalcule le stock disponible d'un événement après réécriture de ses types de tickets."""
+    db.session.flush()
+    available = (select(func.coalesce(func.sum(TicketType.available_quantity), 0))
+                 .where(TicketType.event_id == Event.id)
+                 .scalar_subquery())
+    db.session.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(available_total=available)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _expected_event_counters():
+    sales = dict((row[0], row[1:]) for row in db.session.execute(
+        select(Ticket.event_id, func.sum(Ticket.quantity), func.sum(Ticket.total_price))
+        .group_by(Ticket.event_id)
+    ))
+    stock = dict(db.session.execute(
+        select(TicketType.event_id, func.sum(TicketType.available_quantity))
+        .group_by(TicketType.event_id)
+    ).all())
+    expected = {}
+    for event_id in db.session.scalars(select(Event.id)):
+        sold, revenue = sales.get(event_id, (0, 0))
+        expected[event_id] = (sold or 0, revenue or 0, stock.get(event_id) or 0)
+    return expected
+
+
+def _expected_ticket_type_counters():
+    sales = dict((row[0], row[1:]) for row in db.session.execute(
+        select(Ticket.ticket_type_id, func.sum(Ticket.quantity), func.sum(Ticket.total_price))
+        .group_by(Ticket.ticket_type_id)
+    ))
+    return {ticket_type_id: tuple(v or 0 for v in sales.get(ticket_type_id, (0, 0)))
+            for ticket_type_id in db.session.scalars(select(TicketType.id))}
+
+
+def _drifts(model, counters, expected):
+    stored = db.session.execute(select(model.id, *(getattr(model, c) for c in counters)))
+    drifts = []
+    for row in stored:
+        values = expected.get(row[0])
+        if values is None:
+            continue
+        for name, actual, wanted in zip(counters, row[1:], values):
+            if abs((actual or 0) - wanted) > 1e-6:
+                drifts.append((model.__tablename__, row[0], name, actual, wanted))
+    return drifts
+
+
+def reconcile_counters(fix=False):
+    """Compare les compteurs stockés aux valeurs recalculées.
+
+    Retourne la liste des écarts [(table, id, compteur, stocké, attendu)].
+    Avec `fix`, les lignes en écart sont corrigées en lot.
+    """
+    expected_events = _expected_event_counters()
+    expected_types = _expected_ticket_type_counters()
+    drifts = (_drifts(Event, EVENT_COUNTERS, expected_events)
+              + _drifts(TicketType, TICKET_TYPE_COUNTERS, expected_types))
+
+    if fix and drifts:
+        expected = {'event': (Event, EVENT_COUNTERS, expected_events),
+                    'ticket_type': (TicketType, TICKET_TYPE_COUNTERS, expected_types)}
+        for table in {d[0] for d in drifts}:
+            model, counters, values = expected[table]
+            ids = {d[1] for d in drifts if d[0] == table}
+            db.session.execute(
+                update(model),
+                [dict(id=row_id, **dict(zip(counters, values[row_id]))) for row_id in ids]
+            )
+        db.session.commit()
+    return drifts
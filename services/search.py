@@ -0,0 +1,158 @@
+"""Recherche plein texte sur les événements.
+
+- PostgreSQL : colonne `event.search_vector` (tsvector) tenue à jour par
+  trigger et indexée en GIN, résultats classés par `ts_rank`.
+- SQLite (développement, tests) : table virtuelle FTS5 `event_fts`
+  synchronisée par triggers, résultats classés par `bm25`.
+
+Les triggers garantissent la synchronisation lors de toute écriture sur
+`event` (création, modification, suppression). Sans index, la recherche
+se replie sur un filtre `ILIKE`.
+"""
+import re
+from sqlalchemy import Float, Integer, func, inspect, literal_column, or_, text
+from models import db, Event
+
+SEARCH_CONFIG = 'french'
+
+POSTGRESQL_DDL = [
+    "ALTER TABLE event ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    f"""
+    CREATE OR REPLACE FUNCTION event_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS event_search_vector_trigger ON event",
+    """
+    CREATE TRIGGER event_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON event
+    FOR EACH ROW EXECUTE FUNCTION event_search_vector_update()
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_event_search_vector ON event USING GIN (search_vector)",
+]
+
+SQLITE_FTS_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS event_fts USING fts5(
+        title, description, content='event', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """
+
+SQLITE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS event_fts_ai AFTER INSERT ON event BEGIN
+        INSERT INTO event_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_fts_ad AFTER DELETE ON event BEGIN
+        INSERT INTO event_fts(event_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_fts_au AFTER UPDATE OF title, description ON event BEGIN
+        INSERT INTO event_fts(event_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO event_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+SQLITE_FTS_REBUILD = "INSERT INTO event_fts(event_fts) VALUES ('rebuild')"
+
+SQLITE_DDL = [SQLITE_FTS_TABLE] + SQLITE_FTS_TRIGGERS
+
+
+def restore_sqlite_fts_triggers(connection):
+    """Recrée les triggers FTS5 de `event` puis reconstruit l'index (SQLite uniquement).
+
+    Sous SQLite, `batch_alter_table('event')` reconstruit la table et
+    supprime ses triggers : les migrations concernées appellent cette
+    fonction après leurs blocs batch. Sans table `event_fts`, rien n'est fait.
+    """
+    if connection.dialect.name != 'sqlite' or not inspect(connection).has_table('event_fts'):
+        return
+    for statement in SQLITE_FTS_TRIGGERS + [SQLITE_FTS_REBUILD]:
+        connection.execute(text(statement))
+
+
+_backend_cache = {}
+
+
+def search_backend():
+    """Retourne le moteur de recherche disponible : 'postgresql', 'sqlite' ou None."""
+    engine = db.engine
+    if engine.url not in _backend_cache:
+        inspector = inspect(engine)
+        backend = None
+        if engine.dialect.name == 'postgresql':
+            if any(c['name'] == 'search_vector' for c in inspector.get_columns('event')):
+                backend = 'postgresql'
+        elif engine.dialect.name == 'sqlite':
+            if inspector.has_table('event_fts'):
+                backend = 'sqlite'
+        _backend_cache[engine.url] = backend
+    return _backend_cache[engine.url]
+
+
+def install_search_index():
+    """Crée (si besoin) l'index plein texte et ses triggers, puis le reconstruit."""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        for statement in POSTGRESQL_DDL:
+            db.session.execute(text(statement))
+        # Le trigger recalcule la colonne lors de la mise à jour
+        db.session.execute(text("UPDATE event SET title = title"))
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            db.session.execute(text(statement))
+        db.session.execute(text(SQLITE_FTS_REBUILD))
+    else:
+        raise RuntimeError(f"Recherche plein texte non supportée pour {dialect}")
+    db.session.commit()
+    _backend_cache.clear()
+
+
+def _fts5_query(term):
+    """Convertit la saisie utilisateur en requête FTS5 sûre (préfixes, ET implicite)."""
+    words = re.findall(r'\w+', term)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def apply_search(query, term):
+    """Filtre `query` (sur Event) par `term`.
+
+    Retourne le couple (requête, score de pertinence) ; plus le score est
+    élevé, plus le résultat est pertinent. Le score vaut None lorsque les
+    résultats ne sont pas classés par pertinence.
+    """
+    backend = search_backend()
+
+    if backend == 'postgresql':
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, term)
+        search_vector = literal_column('event.search_vector')
+        query = query.filter(search_vector.op('@@')(ts_query))
+        return query, func.ts_rank(search_vector, ts_query)
+
+    if backend == 'sqlite':
+        fts_query = _fts5_query(term)
+        if not fts_query:
+            return query.filter(db.false()), None
+        matches = (text("SELECT rowid AS event_id, bm25(event_fts, 10.0, 1.0) AS rank "
+                        "FROM event_fts WHERE event_fts MATCH :fts_query")
+                   .bindparams(fts_query=fts_query)
+                   .columns(event_id=Integer, rank=Float)
+                   .subquery('event_matches'))
+        query = query.join(matches, matches.c.event_id == Event.id)
+        # bm25 : plus le score est bas, plus le résultat est pertinent
+        return query, -matches.c.rank
+
+    query = query.filter(or_(
+        Event.title.ilike(f'%{term}%'),
+        Event.description.ilike(f'%{term}%')
+    ))
+    return query, None
@@ -0,0 +1,13 @@
+"""Outils SQL communs aux services."""
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db
+
+
+def upsert(model):
+    """Retourne un INSERT du dialecte courant, qui accepte `on_conflict_do_update`."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise RuntimeError(f"INSERT ... ON CONFLICT non supporté pour {dialect}")
@@ -0,0 +1,174 @@
+"""Diffusion des fichiers statiques : URL empreintées, cache long, précompression.
+
+- `url_for('static', filename=...)` ajoute `?v=<empreinte du contenu>` ;
+  une URL empreintée désigne toujours le même contenu et est servie avec
+  `Cache-Control: public, max-age=STATIC_MAX_AGE, immutable`.
+- Les images d'événements traitées (`uploads/events/<empreinte>-<largeur>w.*`)
+  sont nommées par leur contenu et reçoivent le même en-tête.
+- Les autres fichiers sont revalidés à chaque usage (`no-cache` + ETag).
+- `flask compress-static` écrit à côté des CSS/JS/SVG une version `.gz`
+  (et `.br` si le paquet `brotli` est installé) ; elle est servie telle
+  quelle lorsque le client l'accepte.
+- `STATIC_OFFLOAD` délègue l'envoi du fichier au serveur frontal :
+  'x-accel-redirect' (nginx, `location STATIC_ACCEL_PREFIX { internal; alias static/; }`)
+  ou 'x-sendfile' (Apache, lighttpd). Le worker ne produit que les en-têtes.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from flask import abort, current_app, request
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.svg', '.json', '.map', '.txt', '.xml')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+CONTENT_NAMED = re.compile(r'^uploads/events/[0-9a-f]{16}-\d+w\.(jpg|png|webp)$')
+
+_fingerprints = {}
+_fingerprints_lock = threading.Lock()
+
+
+def fingerprint(filename):
+    """Retourne l'empreinte (12 caractères) du fichier statique, ou None s'il n'existe pas."""
+    path = safe_join(current_app.static_folder, filename)
+    try:
+        stat = os.stat(path) if path else None
+    except OSError:
+        return None
+    if stat is None:
+        return None
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _fingerprints_lock:
+        cached = _fingerprints.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    value = digest.hexdigest()[:12]
+    with _fingerprints_lock:
+        _fingerprints[path] = (key, value)
+    return value
+
+
+def _add_fingerprint(endpoint, values):
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        value = fingerprint(values['filename'])
+        if value:
+            values['v'] = value
+
+
+def _precompressed(path):
+    """Retourne (chemin, encodage) de la meilleure version acceptée par le client."""
+    if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return path, None
+    source_mtime = os.stat(path).st_mtime_ns
+    for encoding, extension in ENCODINGS:
+        if not request.accept_encodings[encoding]:
+            continue
+        try:
+            if os.stat(path + extension).st_mtime_ns >= source_mtime:
+                return path + extension, encoding
+        except FileNotFoundError:
+            continue
+    return path, None
+
+
+def _send(path, mimetype):
+    if current_app.config['STATIC_OFFLOAD'] == 'x-accel-redirect':
+        response = current_app.response_class(mimetype=mimetype)
+        relative = os.path.relpath(path, current_app.static_folder).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = current_app.config['STATIC_ACCEL_PREFIX'] + relative
+        return response
+    # X-Sendfile limité à cette vue : USE_X_SENDFILE s'appliquerait à tous les
+    # `send_file` de l'application (PDF, QR codes, aperçus hors du dossier static)
+    return send_file(
+        path, request.environ, mimetype=mimetype, conditional=True, etag=True, max_age=None,
+        use_x_sendfile=current_app.config['STATIC_OFFLOAD'] == 'x-sendfile',
+        response_class=current_app.response_class
+    )
+
+
+def serve_static(filename):
+    """Vue de remplacement de l'endpoint 'static'."""
+    path = safe_join(current_app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    send_path, encoding = _precompressed(path)
+    response = _send(send_path, mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if path.endswith(COMPRESSIBLE_EXTENSIONS):
+        response.vary.add('Accept-Encoding')
+
+    version = request.args.get('v')
+    if CONTENT_NAMED.match(filename) or (version and version == fingerprint(filename)):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['STATIC_MAX_AGE']
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def compress_static(folder, min_size=256):
+    """Précompresse les CSS/JS/SVG de `folder` ; retourne la liste des fichiers écrits.
+
+    Les versions à jour ou qui ne réduisent pas la taille sont ignorées.
+    `uploads/` (contenu des utilisateurs, déjà compressé) n'est pas parcouru.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    written = []
+    for root, dirs, files in os.walk(folder):
+        if os.path.abspath(root) == os.path.abspath(folder):
+            dirs[:] = [d for d in dirs if d != 'uploads']
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            source_stat = os.stat(path)
+            if source_stat.st_size < min_size:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            compressors = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                compressors.append(('.br', lambda raw: brotli.compress(raw, quality=11)))
+            for extension, compress in compressors:
+                target = path + extension
+                if os.path.exists(target) and os.stat(target).st_mtime_ns >= source_stat.st_mtime_ns:
+                    continue
+                compressed = compress(data)
+                if len(compressed) >= len(data):
+                    if os.path.exists(target):
+                        os.remove(target)
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+                written.append(target)
+    return written
+
+
+def init_static_assets(app):
+    """Installe l'empreinte des URL statiques et la vue de diffusion."""
+    app.config.setdefault('STATIC_MAX_AGE', 365 * 24 * 3600)
+    app.config.setdefault('STATIC_OFFLOAD', '')
+    app.config.setdefault('STATIC_ACCEL_PREFIX', '/_static/')
+    if app.config['STATIC_OFFLOAD'] not in ('', 'x-accel-redirect', 'x-sendfile'):
+        raise RuntimeError(f"STATIC_OFFLOAD inconnu : {app.config['STATIC_OFFLOAD']}")
+
+    app.url_defaults(_add_fingerprint)
+    app.view_functions['static'] = serve_static
@@ -0,0 +1,153 @@
+"""Export des tickets d'un événement.
+
+- ZIP : un PDF par ticket, transmis au fil de l'eau pendant la requête ;
+- PDF multi-pages : assemblé par le worker (tâche `ticket_export_pdf`) à
+  partir des PDF de tickets en cache, puis téléchargé une fois prêt.
+"""
+import glob
+import os
+import time
+import uuid
+import zipfile
+from flask import current_app
+from sqlalchemy.orm import joinedload
+from models import Ticket
+from services.jobs import register_job, enqueue
+from services.pdf_cache import pdf_version, get_cached_pdf
+from services.rendering import render_ticket_pdf, render_tickets_pdf
+
+EXPORT_FORMATS = ('pdf', 'zip')
+EXPORT_MAX_AGE = 24 * 3600  # Les exports PDF sont supprimés au bout d'un jour
+
+
+def export_query(event_id, ticket_type_id=None, payment_status=None):
+    """Retourne la requête des tickets à exporter, lue par lots depuis la base."""
+    query = (Ticket.query
+             .options(joinedload(Ticket.event), joinedload(Ticket.ticket_type), joinedload(Ticket.user))
+             .filter(Ticket.event_id == event_id))
+    if ticket_type_id:
+        query = query.filter(Ticket.ticket_type_id == ticket_type_id)
+    if payment_status:
+        query = query.filter(Ticket.payment_status == payment_status)
+    return query.order_by(Ticket.id).yield_per(200)
+
+
+class _ChunkWriter:
+    """Fichier en écriture seule dont le contenu est récupéré par morceaux."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_tickets_zip(tickets):
+    """Génère une archive ZIP (un PDF par ticket) au fil de l'eau.
+
+    Les PDF déjà présents dans le cache sont réutilisés tels quels.
+    """
+    writer = _ChunkWriter()
+    # Les PDF sont déjà compressés : inutile de les recompresser
+    with zipfile.ZipFile(writer, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for ticket in tickets:
+            info = ticket.get_pdf_info()
+            cached_path = get_cached_pdf(ticket.id, pdf_version(info))
+            if cached_path:
+                with open(cached_path, 'rb') as f:
+                    pdf = f.read()
+            else:
+                pdf = render_ticket_pdf(info)
+            archive.writestr(f"ticket_{ticket.id}.pdf", pdf)
+            yield writer.drain()
+    yield writer.drain()
+
+
+def enqueue_pdf_export(event_id, user_id, ticket_type_id=None, payment_status=None):
+    """Programme l'assemblage du PDF multi-pages (le commit est laissé à l'appelant).
+
+    Un export identique déjà en cours pour le même utilisateur est réutilisé.
+    """
+    payload = {
+        'export_id': uuid.uuid4().hex,
+        'event_id': event_id,
+        'ticket_type_id': ticket_type_id,
+        'payment_status': payment_status
+    }
+    # Un export par utilisateur : le suivi et le téléchargement sont réservés à son auteur
+    key = f"ticket_export_pdf:{event_id}:{user_id}:{ticket_type_id or ''}:{payment_status or ''}"
+    return enqueue('ticket_export_pdf', payload, key=key, user_id=user_id)
+
+
+def export_pdf_path(export_id):
+    """Retourne le chemin d'un export PDF assemblé par le worker."""
+    return os.path.join(current_app.config['TICKET_EXPORT_FOLDER'], f"export_{export_id}.pdf")
+
+
+def _prepare_pdf_export(payload):
+    # Pour chaque ticket : le PDF en cache s'il existe, sinon les informations à rendre
+    pages = []
+    tickets = export_query(payload['event_id'], payload['ticket_type_id'], payload['payment_status'])
+    for ticket in tickets:
+        info = ticket.get_pdf_info()
+        pages.append((get_cached_pdf(ticket.id, pdf_version(info)), info))
+    output = export_pdf_path(payload['export_id'])
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    return {'output': output, 'pages': pages}
+
+
+def assemble_tickets_pdf(data):
+    """Assemble le PDF multi-pages dans `data['output']` et retourne son chemin.
+
+    Les pages sont importées depuis les PDF de tickets en cache ; seuls les
+    tickets absents du cache sont rendus. Sans `pypdfium2`, le document est
+    entièrement rendu avec ReportLab. Dans les deux cas, le worker garde le
+    document complet en mémoire jusqu'à son enregistrement.
+    """
+    output = data['output']
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        with open(tmp_path, 'wb') as f:
+            render_tickets_pdf((info for _, info in data['pages']), f)
+    else:
+        document = pdfium.PdfDocument.new()
+        for cached_path, info in data['pages']:
+            source = pdfium.PdfDocument(cached_path or render_ticket_pdf(info))
+            document.import_pages(source)
+            source.close()
+        document.save(tmp_path)
+        document.close()
+    os.replace(tmp_path, output)
+    return output
+
+
+def _store_pdf_export(payload, output):
+    prune_exports(EXPORT_MAX_AGE)
+
+
+def prune_exports(max_age):
+    """Supprime les exports PDF plus anciens que `max_age` secondes."""
+    limit = time.time() - max_age
+    removed = 0
+    for path in glob.glob(os.path.join(current_app.config['TICKET_EXPORT_FOLDER'], 'export_*.pdf')):
+        try:
+            if os.path.getmtime(path) < limit:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+register_job('ticket_export_pdf', _prepare_pdf_export, assemble_tickets_pdf, _store_pdf_export)
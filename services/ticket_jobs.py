@@ -0,0 +1,42 @@
+"""Tâches de fond liées aux tickets : QR code et PDF."""
+from models import db, Ticket
+from services.jobs import register_job, enqueue
+from services.rendering import render_qr_png
+from services.artifacts import store_artifact
+from services.pdf_cache import render_versioned_pdf, store_pdf
+
+
+def enqueue_ticket_rendering(ticket):
+    """Programme le rendu du QR code et du PDF d'un ticket nouvellement créé."""
+    enqueue('ticket_qr', {'ticket_id': ticket.id}, key=f"ticket_qr:{ticket.id}", user_id=ticket.user_id)
+    enqueue('ticket_pdf', {'ticket_id': ticket.id}, key=f"ticket_pdf:{ticket.id}", user_id=ticket.user_id)
+
+
+def _load_ticket(payload):
+    ticket = db.session.get(Ticket, payload['ticket_id'])
+    if ticket is None:
+        raise LookupError(f"Ticket {payload['ticket_id']} introuvable")
+    return ticket
+
+
+def _prepare_qr(payload):
+    return _load_ticket(payload).get_qr_data()
+
+
+def _store_qr(payload, png):
+    ticket = _load_ticket(payload)
+    ticket.qr_digest = store_artifact(png, '.png')
+    db.session.commit()
+
+
+def _prepare_pdf(payload):
+    return _load_ticket(payload).get_pdf_info()
+
+
+def _store_pdf(payload, result):
+    version, pdf = result
+    store_pdf(payload['ticket_id'], version, pdf)
+
+
+register_job('ticket_qr', _prepare_qr, render_qr_png, _store_qr)
+register_job('ticket_pdf', _prepare_pdf, render_versioned_pdf, _store_pdf)
@@ -0,0 +1,179 @@
+"""Images d'événements : stockage dédupliqué et compté par référence.
+
+Les fichiers de `UPLOAD_FOLDER` sont nommés d'après l'empreinte de leur
+contenu (voir `services.images`) : une image téléversée plusieurs fois
+n'occupe qu'une place. La table `stored_file` compte, pour chaque image,
+les événements qui la référencent ; `acquire_upload` et `release_upload`
+s'exécutent dans la transaction qui modifie `event`, de sorte qu'un
+rollback n'altère pas les compteurs.
+
+Aucune route ne supprime de fichier. `collect_garbage` (commande
+`flask gc-uploads`) efface par lots :
+- les images dont le compteur est retombé à zéro ;
+- les fichiers sans ligne dans `stored_file` (transaction de création
+  en échec, anciens téléversements remplacés par leur version traitée).
+
+Un délai de grâce protège les fichiers récents : `process_image` rafraîchit
+la date des fichiers qu'il réutilise, si bien qu'un téléversement en
+cours ne perd pas ses fichiers avant d'avoir pris sa référence.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, delete, func, select, update
+from models import db, Event, StoredFile
+from services.images import variant_files
+from services.sql import upsert
+
+URL_PREFIX = '/static/uploads/events/'
+
+
+def upload_url(name):
+    """Retourne l'URL publique d'un fichier de `UPLOAD_FOLDER`."""
+    return URL_PREFIX + name
+
+
+def upload_name(url):
+    """Retourne le nom de fichier d'une image locale, ou None (URL externe, vide)."""
+    if url and url.startswith(URL_PREFIX):
+        name = url[len(URL_PREFIX):]
+        if name and '/' not in name:
+            return name
+    return None
+
+
+def _size(name):
+    folder = current_app.config['UPLOAD_FOLDER']
+    size = 0
+    for filename in variant_files(name):
+        try:
+            size += os.path.getsize(os.path.join(folder, filename))
+        except FileNotFoundError:
+            pass
+    return size
+
+
+def acquire_upload(url, count=1):
+    """Ajoute `count` référence(s) à l'image locale désignée par `url`."""
+    name = upload_name(url)
+    if name is None:
+        return
+    statement = upsert(StoredFile).values(name=name, ref_count=count, size_bytes=_size(name),
+                                          created_at=datetime.utcnow())
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'ref_count': StoredFile.ref_count + statement.excluded.ref_count, 'released_at': None}
+    ))
+
+
+def release_upload(url, count=1):
+    """Retire `count` référence(s) ; les fichiers sont supprimés plus tard par `collect_garbage`."""
+    name = upload_name(url)
+    if name is None:
+        return
+    db.session.execute(
+        update(StoredFile).where(StoredFile.name == name)
+        .values(ref_count=case((StoredFile.ref_count > count, StoredFile.ref_count - count), else_=0),
+                released_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def replace_upload(old_url, new_url):
+    """Déplace la référence d'un événement de `old_url` vers `new_url`."""
+    if old_url != new_url:
+        release_upload(old_url)
+        acquire_upload(new_url)
+
+
+def recount_references():
+    """Recalcule les compteurs et les tailles à partir de `event` ; retourne le nombre d'images suivies."""
+    counts = {}
+    for url, count in db.session.execute(
+            select(Event.image_url, func.count())
+            .where(Event.image_url.like(URL_PREFIX + '%'))
+            .group_by(Event.image_url)):
+        name = upload_name(url)
+        if name is not None:
+            counts[name] = counts.get(name, 0) + count
+
+    now = datetime.utcnow()
+    for stored in StoredFile.query.all():
+        count = counts.pop(stored.name, 0)
+        if stored.ref_count != count:
+            stored.released_at = None if count else now
+            stored.ref_count = count
+        stored.size_bytes = _size(stored.name)
+    for name, count in counts.items():
+        db.session.add(StoredFile(name=name, ref_count=count, size_bytes=_size(name), created_at=now))
+    db.session.commit()
+    return StoredFile.query.count()
+
+
+def _remove(path, cutoff, dry_run):
+    """Supprime `path` s'il n'a pas été modifié depuis `cutoff` ; retourne la taille libérée ou None."""
+    try:
+        stat = os.stat(path)
+        if stat.st_mtime >= cutoff:
+            return None
+        if not dry_run:
+            os.remove(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size
+
+
+def collect_garbage(batch_size=200, grace=timedelta(hours=1), dry_run=False):
+    """Supprime les images non référencées ; retourne {'images', 'files', 'bytes'}.
+
+    Les lignes de `stored_file` sont traitées par lots de `batch_size`,
+    chacun dans sa propre transaction. Avec `dry_run`, rien n'est supprimé.
+    """
+    folder = current_app.config['UPLOAD_FOLDER']
+    cutoff = datetime.utcnow() - grace
+    cutoff_ts = time.time() - grace.total_seconds()
+    stats = {'images': 0, 'files': 0, 'bytes': 0}
+
+    # 1. Images dont le compteur est à zéro depuis plus que le délai de grâce
+    last = ''
+    while True:
+        names = db.session.scalars(
+            select(StoredFile.name)
+            .where(StoredFile.ref_count <= 0, StoredFile.released_at < cutoff, StoredFile.name > last)
+            .order_by(StoredFile.name).limit(batch_size)
+        ).all()
+        if not names:
+            break
+        last = names[-1]
+        if not dry_run:
+            # Une référence prise entre-temps retire la ligne du lot
+            names = db.session.scalars(
+                delete(StoredFile)
+                .where(StoredFile.name.in_(names), StoredFile.ref_count <= 0)
+                .returning(StoredFile.name)
+            ).all()
+            db.session.commit()
+        stats['images'] += len(names)
+        for name in names:
+            for filename in variant_files(name):
+                size = _remove(os.path.join(folder, filename), cutoff_ts, dry_run)
+                if size is not None:
+                    stats['files'] += 1
+                    stats['bytes'] += size
+
+    # 2. Fichiers qu'aucune ligne de `stored_file` ne couvre
+    referenced = set()
+    for name in db.session.scalars(select(StoredFile.name).execution_options(yield_per=batch_size)):
+        referenced.update(variant_files(name))
+    db.session.commit()
+
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name in referenced or entry.name.startswith('.'):
+                continue
+            size = _remove(entry.path, cutoff_ts, dry_run)
+            if size is not None:
+                stats['files'] += 1
+                stats['bytes'] += size
+    return stats
@@ -0,0 +1,67 @@
+"""Listes d'administration des utilisateurs et revue des demandes d'organisateur.
+
+Les filtres s'appuient sur des index :
+- préfixe de nom d'utilisateur ou d'email : index sur `lower(username)`
+  et `lower(email)` (`varchar_pattern_ops` sous PostgreSQL, qui sert les
+  `LIKE 'préfixe%'` ; sous SQLite, le préfixe devient un intervalle) ;
+- rôle : index (role, id), qui sert aussi l'ordre de la pagination ;
+- statut de demande : index (organizer_request_status, organizer_request_date).
+
+Les décisions groupées sont appliquées par un seul UPDATE, limité aux
+demandes encore en attente ; les utilisateurs concernés sont retirés du
+cache de `services.principal`.
+"""
+from datetime import datetime
+from sqlalchemy import and_, func, or_, update
+from models import db, User
+from services.principal import invalidate_principal
+
+ROLES = ('user', 'organizer', 'admin', 'super_admin')
+REQUEST_STATUSES = ('pending', 'approved', 'rejected')
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def prefix_match(expression, prefix):
+    """Condition « `expression` commence par `prefix` », servie par un index sur `expression`."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return expression.like(_escape_like(prefix) + '%', escape='\\')
+    # SQLite n'utilise pas d'index d'expression pour LIKE : intervalle [préfixe, préfixe suivant)
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(expression >= prefix, expression < upper)
+
+
+def filter_users(query, term='', role='', status=''):
+    """Applique à `query` (sur User) la recherche par préfixe, le rôle et le statut de demande."""
+    term = term.strip().lower()
+    if term:
+        conditions = [prefix_match(func.lower(User.email), term)]
+        if '@' not in term:
+            conditions.append(prefix_match(func.lower(User.username), term))
+        query = query.filter(or_(*conditions))
+    if role in ROLES:
+        query = query.filter(User.role == role)
+    if status in REQUEST_STATUSES:
+        query = query.filter(User.organizer_request_status == status)
+    return query
+
+
+def review_organizer_requests(user_ids, approve):
+    """Approuve ou rejette en une requête les demandes en attente ; retourne le nombre traité."""
+    if not user_ids:
+        return 0
+    values = {'organizer_request_status': 'approved' if approve else 'rejected',
+              'organizer_request_date': datetime.utcnow()}
+    if approve:
+        values['role'] = 'organizer'
+    result = db.session.execute(
+        update(User)
+        .where(User.id.in_(user_ids), User.organizer_request_status == 'pending')
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    invalidate_principal(*user_ids)
+    return result.rowcount
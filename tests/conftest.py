@@ -0,0 +1,67 @@
+"""Fixtures communes : application sur une base SQLite temporaire.
+
+La configuration est lue par app.py à l'import : les variables
+d'environnement sont donc définies avant d'importer l'application.
+Aucun contexte d'application ne reste actif pendant les requêtes de test,
+sans quoi `g` (utilisateur connecté, compteur de requêtes SQL) serait
+partagé d'une requête à l'autre.
+"""
+import os
+import tempfile
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix='event_flask_tests_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ['QUERY_BUDGET_MODE'] = 'raise'
+os.environ['PAGE_CACHE_BACKEND'] = 'none'
+os.environ['STRIPE_WEBHOOK_SECRET'] = 'whsec_test'
+for name in ('TICKET_PDF_FOLDER', 'TICKET_EXPORT_FOLDER', 'ARTIFACT_FOLDER', 'IDENTITY_PREVIEW_FOLDER'):
+    os.environ[name] = os.path.join(_tmp, name.lower())
+
+from app import app as flask_app  # noqa: E402
+from models import db, User  # noqa: E402
+from services.principal import invalidate_principal  # noqa: E402
+from services.query_report import seed_dataset  # noqa: E402
+from services.search import install_search_index  # noqa: E402
+from services.facets import rebuild_facets  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        db.create_all()
+        install_search_index()
+        seed_dataset(events=40, tickets_per_event=3)
+        rebuild_facets()
+        db.session.commit()
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _user_with_role(role):
+    user = User.query.filter_by(username=f'test_{role}').first()
+    if user is None:
+        user = User(f'test_{role}', f'test_{role}@example.com', 'secret')
+        user.role = role
+        db.session.add(user)
+        db.session.commit()
+    return user
+
+
+@pytest.fixture
+def login(app, client):
+    """Connecte le client de test avec un utilisateur du rôle donné ; retourne son id."""
+    def login_as(role='user'):
+        with app.app_context():
+            user_id = _user_with_role(role).id
+            invalidate_principal(user_id)
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        return user_id
+    return login_as
@@ -0,0 +1,30 @@
+"""Facettes des filtres de la page d'accueil."""
+from datetime import datetime, timedelta
+from models import db, Event
+from services.facets import get_facets, invalidate_facets, rebuild_facets
+
+
+def test_upcoming_facets_match_upcoming_listing(app):
+    with app.app_context():
+        organizer_id = Event.query.first().organizer_id
+        now = datetime.now()
+        # Plus tôt aujourd'hui (non listé) et plus tard aujourd'hui (listé) si l'heure le permet
+        earlier = max(now - timedelta(minutes=1), datetime.combine(now.date(), datetime.min.time()))
+        later = min(now + timedelta(minutes=5), datetime.combine(now.date(), datetime.max.time()))
+        events = [Event(title=f'Facette {i}', description='Test', event_type='FacetTest', date=day,
+                        location='FacetVille', organizer_id=organizer_id)
+                  for i, day in enumerate([earlier, later, now + timedelta(days=2)])]
+        db.session.add_all(events)
+        db.session.commit()
+        rebuild_facets()
+        invalidate_facets()
+        try:
+            listed = Event.query.filter(Event.event_type == 'FacetTest', Event.date > datetime.now()).count()
+            counts = dict(get_facets(upcoming_only=True)['event_type'])
+            assert counts.get('FacetTest', 0) == listed
+            assert dict(get_facets()['event_type'])['FacetTest'] == 3
+        finally:
+            for event in events:
+                db.session.delete(event)
+            db.session.commit()
+            rebuild_facets()
@@ -0,0 +1,170 @@
+"""Traitement des webhooks Stripe : doublons, désordre et paiements différés.
+
+Les événements Stripe sont des charges utiles factices ; la vérification
+de signature et l'API de remboursement sont remplacées.
+"""
+import itertools
+from datetime import datetime, timedelta
+import pytest
+import stripe
+from models import db, Event, StripeEvent, Ticket, TicketHold, TicketType, User
+from services.fulfillment import process_next_event
+from services.holds import create_hold
+
+_ids = itertools.count(1)
+_delivered = []
+
+
+@pytest.fixture
+def refunds(monkeypatch):
+    calls = []
+    monkeypatch.setattr(stripe.Refund, 'create', lambda **kwargs: calls.append(kwargs))
+    return calls
+
+
+@pytest.fixture
+def deliver(client, monkeypatch):
+    """Envoie un événement au webhook sans signature réelle."""
+    monkeypatch.setattr(stripe.Webhook, 'construct_event', lambda payload, sig, secret: _delivered.pop(0))
+
+    def send(event):
+        _delivered.append(event)
+        response = client.post('/stripe/webhook', data=b'{}', headers={'Stripe-Signature': 'test'})
+        assert response.status_code == 200
+    return send
+
+
+@pytest.fixture
+def checkout(app):
+    """Crée un événement, un type de ticket de 5 places et une réservation de 2 places."""
+    n = next(_ids)
+    with app.app_context():
+        organizer = User(f'fulfil_org_{n}', f'fulfil_org_{n}@example.com', 'secret')
+        buyer = User(f'fulfil_buyer_{n}', f'fulfil_buyer_{n}@example.com', 'secret')
+        db.session.add_all([organizer, buyer])
+        db.session.flush()
+        event = Event(title=f'Concert {n}', description='Test', event_type='Concert',
+                      date=datetime.now() + timedelta(days=30), location='Dakar', organizer_id=organizer.id)
+        db.session.add(event)
+        db.session.flush()
+        ticket_type = TicketType(event_id=event.id, name='Standard', price=10,
+                                 total_quantity=5, available_quantity=5)
+        db.session.add(ticket_type)
+        db.session.flush()
+        hold = create_hold(event.id, ticket_type.id, buyer.id, 2)
+        db.session.commit()
+        return {
+            'session_id': f'cs_test_{n}',
+            'event_id': event.id,
+            'ticket_type_id': ticket_type.id,
+            'hold_id': hold.id,
+            'metadata': {
+                'event_id': str(event.id),
+                'ticket_type_id': str(ticket_type.id),
+                'quantity': '2',
+                'user_id': str(buyer.id),
+                'hold_id': str(hold.id)
+            }
+        }
+
+
+def stripe_event(checkout, event_type, payment_status='paid'):
+    return {
+        'id': f'evt_{next(_ids)}',
+        'type': event_type,
+        'data': {'object': {
+            'id': checkout['session_id'],
+            'payment_status': payment_status,
+            'payment_intent': f"pi_{checkout['session_id']}",
+            'amount_total': 2000,
+            'metadata': checkout['metadata']
+        }}
+    }
+
+
+def process_all(app):
+    with app.app_context():
+        while process_next_event():
+            pass
+
+
+def state(app, checkout):
+    with app.app_context():
+        tickets = Ticket.query.filter_by(stripe_session_id=checkout['session_id']).all()
+        return {
+            'tickets': len(tickets),
+            'inbox': StripeEvent.query.filter_by(checkout_session_id=checkout['session_id']).count(),
+            'pending': StripeEvent.query.filter_by(checkout_session_id=checkout['session_id'], status='reçu').count(),
+            'hold': db.session.get(TicketHold, checkout['hold_id']) is not None,
+            'available': db.session.get(TicketType, checkout['ticket_type_id']).available_quantity,
+        }
+
+
+def test_completed_paid_issues_one_ticket(app, checkout, deliver, refunds):
+    deliver(stripe_event(checkout, 'checkout.session.completed'))
+    process_all(app)
+
+    assert state(app, checkout) == {'tickets': 1, 'inbox': 1, 'pending': 0, 'hold': False, 'available': 3}
+    assert refunds == []
+
+
+def test_duplicate_delivery_is_recorded_once(app, checkout, deliver, refunds):
+    event = stripe_event(checkout, 'checkout.session.completed')
+    deliver(event)
+    deliver(event)
+    process_all(app)
+    deliver(event)
+    process_all(app)
+
+    assert state(app, checkout) == {'tickets': 1, 'inbox': 1, 'pending': 0, 'hold': False, 'available': 3}
+    assert refunds == []
+
+
+def test_unpaid_then_async_payment_succeeded(app, checkout, deliver, refunds):
+    deliver(stripe_event(checkout, 'checkout.session.completed', payment_status='unpaid'))
+    process_all(app)
+    assert state(app, checkout)['tickets'] == 0
+    assert state(app, checkout)['hold']
+
+    deliver(stripe_event(checkout, 'checkout.session.async_payment_succeeded'))
+    process_all(app)
+
+    assert state(app, checkout) == {'tickets': 1, 'inbox': 2, 'pending': 0, 'hold': False, 'available': 3}
+    assert refunds == []
+
+
+def test_out_of_order_delivery(app, checkout, deliver, refunds):
+    # async_payment_succeeded reçu avant checkout.session.completed
+    deliver(stripe_event(checkout, 'checkout.session.async_payment_succeeded'))
+    deliver(stripe_event(checkout, 'checkout.session.completed', payment_status='unpaid'))
+    process_all(app)
+
+    assert state(app, checkout) == {'tickets': 1, 'inbox': 2, 'pending': 0, 'hold': False, 'available': 3}
+    assert refunds == []
+
+
+def test_second_paid_event_does_not_touch_stock(app, checkout, deliver, refunds):
+    deliver(stripe_event(checkout, 'checkout.session.completed'))
+    deliver(stripe_event(checkout, 'checkout.session.async_payment_succeeded'))
+    process_all(app)
+
+    assert state(app, checkout) == {'tickets': 1, 'inbox': 2, 'pending': 0, 'hold': False, 'available': 3}
+    assert refunds == []
+
+
+def test_sold_out_after_hold_expiry_is_refunded_idempotently(app, checkout, deliver, refunds):
+    # La réservation a été libérée et les places vendues entre-temps
+    with app.app_context():
+        db.session.query(TicketHold).filter_by(id=checkout['hold_id']).delete()
+        db.session.get(TicketType, checkout['ticket_type_id']).available_quantity = 0
+        db.session.commit()
+
+    deliver(stripe_event(checkout, 'checkout.session.completed'))
+    process_all(app)
+
+    assert state(app, checkout)['tickets'] == 0
+    assert len(refunds) == 1
+    assert refunds[0]['idempotency_key'] == f"refund:{checkout['session_id']}"
+    with app.app_context():
+        inbox = StripeEvent.query.filter_by(checkout_session_id=checkout['session_id']).one()
+        assert inbox.status == 'remboursé'
@@ -0,0 +1,45 @@
+"""Réservations de places pendant le paiement Stripe."""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+import stripe
+from models import db, Event, TicketHold, TicketType
+
+
+@pytest.fixture
+def stripe_sessions(monkeypatch):
+    created = []
+
+    def create(**kwargs):
+        created.append(kwargs)
+        return SimpleNamespace(id=f'cs_hold_{len(created)}', url='https://checkout.stripe.test/pay',
+                               expires_at=kwargs['expires_at'])
+    monkeypatch.setattr(stripe.checkout.Session, 'create', create)
+    return created
+
+
+@pytest.mark.parametrize('ttl_minutes', [10, 30])
+def test_hold_never_expires_before_checkout_session(app, client, login, stripe_sessions, ttl_minutes):
+    user_id = login('user')
+    with app.app_context():
+        event = Event.query.first()
+        ticket_type = TicketType.query.filter_by(event_id=event.id).first()
+        ticket_type.available_quantity = ticket_type.total_quantity
+        db.session.commit()
+        event_id, ticket_type_id = event.id, ticket_type.id
+
+    app.config['TICKET_HOLD_TTL'] = timedelta(minutes=ttl_minutes)
+    try:
+        response = client.post(f'/event/{event_id}/create-payment',
+                               data={'ticket_type_id': ticket_type_id, 'quantity': 1})
+    finally:
+        app.config['TICKET_HOLD_TTL'] = timedelta(minutes=30)
+    assert response.status_code == 302
+
+    expires_at = stripe_sessions[-1]['expires_at']
+    # Stripe refuse les sessions de moins de 30 minutes
+    assert expires_at > (datetime.utcnow() + timedelta(minutes=30)).timestamp()
+    with app.app_context():
+        hold = TicketHold.query.filter_by(stripe_session_id=f'cs_hold_{len(stripe_sessions)}').one()
+        assert hold.user_id == user_id
+        assert hold.expires_at >= datetime.utcfromtimestamp(expires_at)
@@ -0,0 +1,26 @@
+"""Aperçus des pièces d'identité."""
+import io
+import pytest
+from PIL import Image, ImageOps
+from services.identity_previews import PREVIEW_SIZE, _render
+
+
+@pytest.fixture
+def truncated_jpeg(tmp_path):
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 800), 'red').save(buffer, format='JPEG')
+    data = buffer.getvalue()
+    path = tmp_path / 'recto.jpg'
+    path.write_bytes(data[:len(data) // 3])
+    return str(path)
+
+
+@pytest.mark.parametrize('lazy_transpose', [False, True])
+def test_truncated_upload_renders_placeholder(truncated_jpeg, monkeypatch, lazy_transpose):
+    if lazy_transpose:
+        # Sans orientation EXIF, certaines versions de Pillow ne décodent pas l'image
+        monkeypatch.setattr(ImageOps, 'exif_transpose', lambda image: image)
+
+    image = _render(truncated_jpeg)
+    assert image.mode == 'RGB'
+    assert image.width <= PREVIEW_SIZE[0] and image.height <= PREVIEW_SIZE[1]
@@ -0,0 +1,29 @@
+"""Cache disque des PDF de tickets."""
+import os
+import pytest
+import services.pdf_cache as pdf_cache
+
+
+@pytest.fixture
+def cache(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'TICKET_PDF_FOLDER', str(tmp_path))
+    monkeypatch.setitem(app.config, 'TICKET_PDF_CACHE_MAX_BYTES', 3000)
+    scans = []
+    evict = pdf_cache.evict_pdfs
+    monkeypatch.setattr(pdf_cache, 'evict_pdfs', lambda max_bytes: scans.append(max_bytes) or evict(max_bytes))
+    with app.app_context():
+        yield tmp_path, scans
+
+
+def test_store_scans_only_when_over_budget(cache):
+    folder, scans = cache
+    pdf_cache.store_pdf(1, 'v1', b'x' * 1000)  # Premier stockage : taille inconnue, parcours
+    pdf_cache.store_pdf(2, 'v1', b'x' * 1000)
+    pdf_cache.store_pdf(1, 'v2', b'x' * 1000)  # Remplace la version v1 du ticket 1
+    assert len(scans) == 1
+    assert sorted(os.listdir(folder)) == ['ticket_1_v2.pdf', 'ticket_2_v1.pdf']
+
+    pdf_cache.store_pdf(3, 'v1', b'x' * 1000)
+    pdf_cache.store_pdf(4, 'v1', b'x' * 1000)  # 4000 octets : éviction
+    assert len(scans) == 2
+    assert sum(os.path.getsize(folder / name) for name in os.listdir(folder)) <= 3000
@@ -0,0 +1,66 @@
+"""Les routes budgétées respectent leur budget de requêtes SQL (QUERY_BUDGET_MODE='raise')."""
+import pytest
+from flask import g
+from models import Event
+from services.query_budget import QueryBudgetExceeded
+
+
+def test_raise_mode_is_active(app):
+    assert app.config['QUERY_BUDGET_MODE'] == 'raise'
+
+
+@pytest.mark.parametrize('query_string', [
+    '',
+    '?price_sort=asc',
+    '?price_sort=desc',
+    '?status=upcoming',
+    '?type=Concert&location=Dakar',
+    '?search=événement',
+    '?per_page=-1',
+    '?per_page=1000',
+])
+def test_index_within_budget(client, query_string):
+    response = client.get(f'/{query_string}')
+    assert response.status_code == 200
+
+
+def test_index_next_page_within_budget(client):
+    response = client.get('/?partial=1')
+    assert response.status_code == 200
+    next_url = response.headers['X-Next-Url']
+    assert next_url
+    assert client.get(next_url).status_code == 200
+
+
+def test_event_detail_within_budget(client, app):
+    with app.app_context():
+        event_id = Event.query.first().id
+    assert client.get(f'/event/{event_id}').status_code == 200
+
+
+@pytest.mark.parametrize('url', [
+    '/admin/users',
+    '/admin/users?q=seed_user',
+    '/admin/users?role=organizer',
+    '/admin/organizer-requests',
+    '/admin/organizer-requests?status=approved',
+    '/admin/organizer-requests?status=foo',
+])
+def test_admin_listings_within_budget(client, login, url):
+    login('admin')
+    assert client.get(url).status_code == 200
+
+
+def test_organizer_and_user_listings_within_budget(client, login):
+    login('organizer')
+    assert client.get('/my-events-list').status_code == 200
+    login('user')
+    assert client.get('/purchase-history').status_code == 200
+
+
+def test_exceeding_budget_raises(app):
+    # Le budget de `index` est de 6 requêtes
+    with app.test_request_context('/'):
+        g.query_count = 7
+        with pytest.raises(QueryBudgetExceeded):
+            app.process_response(app.make_response('ok'))
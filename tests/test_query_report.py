@@ -0,0 +1,29 @@
+"""Garde-fou de `flask explain-queries --seed` contre les bases hors test."""
+import pytest
+import app as app_module
+import services.query_report as query_report
+from models import Event
+
+
+@pytest.fixture
+def production_database(monkeypatch):
+    monkeypatch.setattr(query_report, 'is_test_database', lambda: False)
+    monkeypatch.setattr(app_module, 'is_test_database', lambda: False)
+
+
+def test_seed_refuses_non_test_database(app, production_database):
+    with app.app_context():
+        before = Event.query.count()
+        with pytest.raises(RuntimeError):
+            query_report.seed_dataset(events=1)
+        assert Event.query.count() == before
+
+
+def test_explain_seed_requires_confirmation(app, production_database):
+    with app.app_context():
+        before = Event.query.count()
+    result = app.test_cli_runner().invoke(args=['explain-queries', '--seed', '1'])
+    assert result.exit_code != 0
+    assert '--allow-non-test-db' in result.output
+    with app.app_context():
+        assert Event.query.count() == before
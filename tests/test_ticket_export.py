@@ -0,0 +1,33 @@
+"""Export PDF multi-pages des tickets d'un événement."""
+import io
+from models import db, Event
+from services.ticket_export import enqueue_pdf_export
+from services.rendering import render_tickets_pdf
+
+
+def test_pdf_export_jobs_are_per_user(app, login):
+    organizer_id = login('organizer')
+    admin_id = login('admin')
+    with app.app_context():
+        event_id = Event.query.first().id
+        organizer_job = enqueue_pdf_export(event_id, organizer_id)
+        admin_job = enqueue_pdf_export(event_id, admin_id)
+        again = enqueue_pdf_export(event_id, organizer_id)
+        assert organizer_job.id != admin_job.id
+        assert again.id == organizer_job.id
+        assert (organizer_job.user_id, admin_job.user_id) == (organizer_id, admin_id)
+        db.session.rollback()
+
+
+def test_fallback_rendering_keeps_overflowing_content():
+    info = {
+        'event_title': 'Concert', 'event_date': '01/01/2030 20:00', 'event_location': 'Dakar',
+        'ticket_type': 'Standard', 'quantity': 1, 'total_price': 10, 'purchase_date': '01/01/2029 10:00',
+        'payment_status': 'payé', 'qr_data': 'Ticket ID: 1'
+    }
+    long_info = dict(info, event_location='<br/>'.join(['Dakar'] * 40))
+    output = io.BytesIO()
+    render_tickets_pdf([info, long_info], output)
+    pdf = output.getvalue()
+    # Le second ticket déborde sur une page supplémentaire au lieu d'être tronqué
+    assert pdf.count(b'/Type /Page\n') == 3